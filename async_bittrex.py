@@ -0,0 +1,263 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterator, Iterator, List, Tuple, Optional, Union
+
+from bittrex import Bittrex, BittrexCandle, BittrexMarket, BittrexCurrency, BittrexTicker, BittrexMarketSummary, \
+    BittrexOrderBook, BittrexMarketHistory, BittrexBuyLimit, BittrexSellLimit, BittrexOpenOrder, BittrexBalance, \
+    BittrexDepositAddress, BittrexWithdraw, BittrexOrder, BittrexOrderHistory, BittrexWithdrawalDepositHistory
+from bulk import BulkOrder, BulkExecution
+from cache import QueryCache
+from candles import CandleSeries
+from orderbook import LocalOrderBook
+from metrics import QueryMetrics
+from ratelimit import RateLimiter
+from scheduler import RequestScheduler
+from transport import Transport, RequestsTransport
+from valuation import Valuation
+
+
+class AsyncBittrex:
+    """
+    Asyncio version of `Bittrex` class. Every method has the same parameters and returns the same
+    `tuple[error, result]` as its `Bittrex` counterpart, but must be awaited.
+
+    Requests are dispatched to a thread pool which shares one pooled transport, so hundreds of calls can be
+    `asyncio.gather`ed. The rate limit of the underlying `Bittrex` instance still applies to all of them.
+
+    The constructor never blocks the event loop: it is lazy and headless by default, so nothing is downloaded and
+    no confirmation is asked. Use `await AsyncBittrex.create(...)` to get an instance with market_info loaded.
+    """
+
+    def __init__(self, apikey: str, secret: str, rate_limit: int = 5, account_name: str = 'NOT_PRIVODED',
+                 max_workers: int = 32, understood="", rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[QueryCache] = None, fast_decode: bool = False,
+                 transport: Optional[Transport] = None, metrics: Optional[QueryMetrics] = None,
+                 scheduler: Optional[RequestScheduler] = None, lazy: bool = True,
+                 market_info_path: Optional[str] = None, headless: bool = True):
+        """
+        :param max_workers: number of requests in flight at once
+        :param transport: Transport shared by all workers, defaults to a RequestsTransport with a connection per worker
+        :param lazy: do not load market_info in the constructor, which would block the event loop
+        :param headless: do not print the warning or ask for confirmation on stdin
+
+        See `Bittrex` for the other parameters.
+        """
+        self.max_workers = max_workers
+        transport = transport or RequestsTransport(pool_maxsize=max_workers)
+        self.client = Bittrex(apikey, secret, rate_limit, account_name, understood=understood,
+                              rate_limiter=rate_limiter, cache=cache, fast_decode=fast_decode, transport=transport,
+                              metrics=metrics, scheduler=scheduler, lazy=lazy, market_info_path=market_info_path,
+                              headless=headless)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='AsyncBittrex')
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> 'AsyncBittrex':
+        """
+        Create an instance and load its market_info in a worker thread.
+        Takes the parameters of the constructor; with lazy=False or headless=False the instance is built in a worker
+        thread too, so neither the download nor the confirmation prompt block the event loop.
+
+        :return: AsyncBittrex
+        """
+        if kwargs.get('lazy', True) and kwargs.get('headless', True):
+            instance = cls(*args, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            instance = await loop.run_in_executor(None, partial(cls, *args, **kwargs))
+        await instance.load_market_info()
+        return instance
+
+    async def _run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
+
+    async def _stream(self, method, *args, batch_size: int = 256) -> Tuple[Any, AsyncIterator]:
+        """
+        Open a streaming `Bittrex` method in a worker thread and turn its iterator into an async iterator.
+        Items are pulled from the worker in batches, so the event loop is not hopped for every item.
+        """
+        err, iterator = await self._run(method, *args)
+        if err:
+            return err, self._aiter(iter(()), batch_size)
+        return err, self._aiter(iterator, batch_size)
+
+    async def _aiter(self, iterator: Iterator, batch_size: int) -> AsyncIterator:
+        while True:
+            batch = await self._run(lambda: list(islice(iterator, batch_size)))
+            if not batch:
+                return
+            for item in batch:
+                yield item
+
+    def close(self):
+        """Shutdown worker threads and close pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.client.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def metrics(self) -> QueryMetrics:
+        return self.client.metrics
+
+    def transport_stats(self):
+        return self.client.transport_stats()
+
+    def cache_stats(self):
+        return self.client.cache_stats()
+
+    def rate_limit_metrics(self) -> dict:
+        return self.client.rate_limit_metrics()
+
+    @property
+    def http_keep_alive(self) -> bool:
+        return self.client.http_keep_alive
+
+    def scheduler_stats(self):
+        return self.client.scheduler_stats()
+
+    @property
+    def market_info(self) -> Optional[dict]:
+        """Loaded on first access, which downloads it in the event loop; await load_market_info() beforehand"""
+        return self.client.market_info
+
+    async def load_market_info(self) -> Optional[dict]:
+        """
+        :return: dict of MarketName -> BittrexMarket, loaded in a worker thread, None if it could not be loaded
+        """
+        return await self._run(lambda: self.client.market_info)
+
+    async def refresh_market_info(self) -> Tuple[Any, Optional[dict]]:
+        return await self._run(self.client.refresh_market_info)
+
+    async def save_market_info(self, path: Optional[str] = None):
+        return await self._run(self.client.save_market_info, path)
+
+    async def validate_order(self, market: str, quantity: float, rate: Optional[float] = None) -> Optional[str]:
+        return await self._run(self.client.validate_order, market, quantity, rate)
+
+    async def get_candles(self, market_name: str, tick_interval: str,
+                          as_arrays: bool = False) -> Tuple[Any, Union[List[BittrexCandle], CandleSeries]]:
+        return await self._run(self.client.get_candles, market_name, tick_interval, as_arrays)
+
+    async def get_latest_candle(self, market_name, tick_interval) -> Tuple[Any, List[BittrexCandle]]:
+        return await self._run(self.client.get_latest_candle, market_name, tick_interval)
+
+    async def get_markets(self) -> Tuple[Any, List[BittrexMarket]]:
+        return await self._run(self.client.get_markets)
+
+    async def get_markets_dict(self) -> Tuple[Any, dict]:
+        return await self._run(self.client.get_markets_dict)
+
+    async def get_currencies(self) -> Tuple[Any, List[BittrexCurrency]]:
+        return await self._run(self.client.get_currencies)
+
+    async def get_ticker(self, market: str) -> Tuple[Any, Optional[BittrexTicker]]:
+        return await self._run(self.client.get_ticker, market)
+
+    async def get_market_summaries(self, max_age: Optional[float] = None) -> Tuple[Any, List[BittrexMarketSummary]]:
+        return await self._run(self.client.get_market_summaries, max_age)
+
+    async def get_market_summaries_dict(self, max_age: Optional[float] = None):
+        return await self._run(self.client.get_market_summaries_dict, max_age)
+
+    async def snapshot(self, max_age: float = 1.0) -> Tuple[Any, dict]:
+        return await self._run(self.client.snapshot, max_age)
+
+    async def get_tickers(self, markets: Optional[List[str]] = None, max_age: float = 1.0) -> Tuple[Any, dict]:
+        return await self._run(self.client.get_tickers, markets, max_age)
+
+    async def get_balances_dict(self) -> Tuple[Optional[Any], Optional[dict]]:
+        return await self._run(self.client.get_balances_dict)
+
+    async def get_estimated_values(self, max_age: float = 1.0, price: str = 'Ask') -> Tuple[Any, Optional[Valuation]]:
+        return await self._run(self.client.get_estimated_values, max_age, price)
+
+    async def get_market_summary(self, market: str) -> Tuple[Any, List[BittrexMarketSummary]]:
+        return await self._run(self.client.get_market_summary, market)
+
+    async def get_orderbook(self, market, order_type='both') -> Tuple[Any, Optional[BittrexOrderBook]]:
+        return await self._run(self.client.get_orderbook, market, order_type)
+
+    async def get_local_orderbook(self, market, book: Optional[LocalOrderBook] = None) \
+            -> Tuple[Any, Optional[LocalOrderBook]]:
+        return await self._run(self.client.get_local_orderbook, market, book)
+
+    async def get_market_history(self, market) -> Tuple[Any, List[BittrexMarketHistory]]:
+        return await self._run(self.client.get_market_history, market)
+
+    async def iter_market_history(self, market, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                  chunk_size: Optional[int] = None) -> Tuple[Any, AsyncIterator[BittrexMarketHistory]]:
+        return await self._stream(self.client.iter_market_history, market, start, end, chunk_size)
+
+    async def buy_limit(self, market, quantity, buy_price) -> Tuple[Any, Optional[BittrexBuyLimit]]:
+        return await self._run(self.client.buy_limit, market, quantity, buy_price)
+
+    async def buy_market(self, market, quantity, use_orderbook: bool = False) -> Tuple[Any, BittrexBuyLimit]:
+        return await self._run(self.client.buy_market, market, quantity, use_orderbook)
+
+    async def sell_limit(self, market, quantity, sell_price) -> Tuple[Any, Optional[BittrexSellLimit]]:
+        return await self._run(self.client.sell_limit, market, quantity, sell_price)
+
+    async def sell_market(self, market, quantity,
+                          use_orderbook: bool = False) -> Tuple[Any, Optional[BittrexSellLimit]]:
+        return await self._run(self.client.sell_market, market, quantity, use_orderbook)
+
+    async def execute_orders(self, orders: List[BulkOrder], use_orderbook: bool = False, max_age: float = 1.0,
+                             max_workers: int = 16) -> Tuple[Any, BulkExecution]:
+        return await self._run(self.client.execute_orders, orders, use_orderbook, max_age, max_workers)
+
+    async def panic_sell_all_for_btc(self, confirm: bool = True,
+                                     use_orderbook: bool = False) -> Tuple[Any, Optional[BulkExecution]]:
+        return await self._run(self.client.panic_sell_all_for_btc, confirm, use_orderbook)
+
+    async def cancel(self, order_uuid) -> Tuple[Any, bool]:
+        return await self._run(self.client.cancel, order_uuid)
+
+    async def get_open_orders(self, market=None) -> Tuple[Any, List[BittrexOpenOrder]]:
+        return await self._run(self.client.get_open_orders, market)
+
+    async def get_balances(self) -> Tuple[Any, List[BittrexBalance]]:
+        return await self._run(self.client.get_balances)
+
+    async def get_balance(self, currency) -> Tuple[Any, Optional[BittrexBalance]]:
+        return await self._run(self.client.get_balance, currency)
+
+    async def get_deposit_address(self, currency) -> Tuple[Any, Optional[BittrexDepositAddress]]:
+        return await self._run(self.client.get_deposit_address, currency)
+
+    async def withdraw(self, currency, quantity, address, paymentid=None) -> Tuple[Any, Optional[BittrexWithdraw]]:
+        return await self._run(self.client.withdraw, currency, quantity, address, paymentid)
+
+    async def get_order(self, order_uuid) -> Tuple[Any, Optional[BittrexOrder]]:
+        return await self._run(self.client.get_order, order_uuid)
+
+    async def get_order_history(self, market=None) -> Tuple[Any, List[BittrexOrderHistory]]:
+        return await self._run(self.client.get_order_history, market)
+
+    async def get_withdrawal_history(self, currency) -> Tuple[Any, List[BittrexWithdrawalDepositHistory]]:
+        return await self._run(self.client.get_withdrawal_history, currency)
+
+    async def get_deposit_history(self, currency) -> Tuple[Any, List[BittrexWithdrawalDepositHistory]]:
+        return await self._run(self.client.get_deposit_history, currency)
+
+    async def iter_order_history(self, market=None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                 chunk_size: Optional[int] = None) -> Tuple[Any, AsyncIterator[BittrexOrderHistory]]:
+        return await self._stream(self.client.iter_order_history, market, start, end, chunk_size)
+
+    async def iter_withdrawal_history(self, currency=None, start: Optional[datetime] = None,
+                                      end: Optional[datetime] = None, chunk_size: Optional[int] = None) \
+            -> Tuple[Any, AsyncIterator[BittrexWithdrawalDepositHistory]]:
+        return await self._stream(self.client.iter_withdrawal_history, currency, start, end, chunk_size)
+
+    async def iter_deposit_history(self, currency=None, start: Optional[datetime] = None,
+                                   end: Optional[datetime] = None, chunk_size: Optional[int] = None) \
+            -> Tuple[Any, AsyncIterator[BittrexWithdrawalDepositHistory]]:
+        return await self._stream(self.client.iter_deposit_history, currency, start, end, chunk_size)
@@ -0,0 +1,232 @@
+import heapq
+import json
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from bittrex import BittrexCandle, BittrexMarket, BittrexMarketSummary, BittrexOrderBook, BittrexTicker
+from cache import QueryCache
+from candles import CandleSeries, INTERVAL_SECONDS
+from candlestore import CandleStore
+from markets import split_market_name
+from papertrex import Papertrex
+from transport import CallbackTransport
+
+_EPOCH = datetime(1970, 1, 1)
+_OFFLINE = json.dumps(dict(success=False, message='NOT_AVAILABLE_IN_BACKTEST', result=None))
+
+
+class VirtualClock:
+    """UTC time of a backtest, moved forward by the replay instead of the wall clock"""
+
+    def __init__(self, start: float = 0.0):
+        """
+        :param start: UTC epoch seconds
+        """
+        self.time = start
+
+    def now(self) -> datetime:
+        return _EPOCH + timedelta(seconds=self.time)
+
+    def advance_to(self, time: float):
+        if time > self.time:
+            self.time = time
+
+
+class Replay:
+    """
+    Candle series of several markets, replayed in the order their candles close.
+
+    Series are only sliced, never copied, so series memory-mapped from a CandleStore are replayed straight from the
+    page cache.
+    """
+
+    def __init__(self, series: Dict[str, CandleSeries], start: Optional[float] = None, end: Optional[float] = None):
+        """
+        :param series: dict of MarketName -> CandleSeries with tick_interval set
+        :param start: replay candles opened at or after this UTC epoch second, None for all
+        :param end: replay candles opened before this UTC epoch second, None for all
+        """
+        self.series = {market: candles.between(start, end) for market, candles in sorted(series.items())}
+
+    @classmethod
+    def from_store(cls, store: CandleStore, markets: List[str], tick_interval: str, start: Optional[float] = None,
+                   end: Optional[float] = None) -> 'Replay':
+        """
+        :param store: CandleStore holding the series
+        :param markets: list of BASE-QUOTE(BTC-USDT)
+        :param tick_interval: BittrexTickIntervalTypes
+        :param start: replay candles opened at or after this UTC epoch second, None for all
+        :param end: replay candles opened before this UTC epoch second, None for all
+        :return: Replay
+        """
+        return cls({market: store.read(market, tick_interval) for market in markets}, start, end)
+
+    @property
+    def markets(self) -> List[str]:
+        return list(self.series)
+
+    def __len__(self) -> int:
+        return sum(len(candles) for candles in self.series.values())
+
+    @staticmethod
+    def _closes(market: str, candles: CandleSeries) -> Iterator[Tuple[float, str, int]]:
+        seconds = INTERVAL_SECONDS[candles.tick_interval]
+        for row, time in enumerate(candles.T):
+            yield time + seconds, market, row
+
+    def events(self) -> Iterator[Tuple[float, str, int]]:
+        """
+        :return: iterator of (close time, market, row) of every candle, by close time and then market
+        """
+        return heapq.merge(*(self._closes(market, candles) for market, candles in self.series.items()))
+
+
+class Backtrex(Papertrex):
+    """
+    Papertrex running on a virtual clock and fed by a Replay instead of the exchange.
+
+    Each replayed candle moves the clock to its close time and is matched against the open paper orders:
+    - orders crossing the open fill at the open, like with a ticker
+    - orders whose limit lies between the low and the high of the candle fill at their limit
+    - the close, `spread` apart, becomes the bid and ask for the orders placed next
+
+    get_ticker, get_orderbook, get_candles, get_latest_candle and get_market_summaries are served from the replayed
+    candles. A strategy only sees candles which closed before the clock. get_balance(s) return paper balances.
+    Nothing is sent to the exchange, so a replay runs as fast as it is matched, and always gives the same results.
+    """
+
+    def __init__(self, replay: Replay, initial_balances: Optional[Dict[str, float]] = None, spread: float = 0.0,
+                 market_info: Optional[dict] = None, closed_order_retention: Optional[int] = None):
+        """
+        :param replay: Replay of the markets to trade
+        :param initial_balances: dict of currency -> paper balance, None to not track balances
+        :param spread: bid-ask spread as a fraction of the close, e.g. 0.001
+        :param market_info: dict of MarketName -> BittrexMarket for order validation, None to allow any quantity
+        :param closed_order_retention: number of closed orders to keep, None to keep all of them
+        """
+        super().__init__('', '', transport=CallbackTransport(lambda url, headers: _OFFLINE), cache=QueryCache(),
+                         lazy=True, headless=True, match_interval=0, closed_order_retention=closed_order_retention,
+                         initial_balances=initial_balances)
+        # the last close is the current bid and ask on the virtual clock, however long the strategy takes
+        self.engine.max_touch_age = None
+        self.replay = replay
+        self.spread = spread
+        self.clock = VirtualClock()
+        self._clock = self.clock.now
+        self._rows: Dict[str, int] = {}
+        self._events = replay.events()
+        self.events = 0
+        self.arrival_prices: Dict[str, float] = {}
+        if market_info is None:
+            market_info = {}
+            for market in replay.markets:
+                base_currency, currency = split_market_name(market)
+                market_info[market] = BittrexMarket(MarketName=market, BaseCurrency=base_currency,
+                                                    MarketCurrency=currency, MinTradeSize=0.0, IsActive=True)
+        self.market_info = market_info
+
+    def run(self, on_candle: Optional[Callable[['Backtrex', str, dict], None]] = None,
+            max_events: Optional[int] = None) -> int:
+        """
+        Replay candles. Can be called again to continue where it stopped.
+
+        :param on_candle: strategy, called with (this instance, market, candle dict) after every candle
+        :param max_events: stop after this many candles, None to replay all of them
+        :return: number of candles replayed by this call
+        """
+        half_spread = self.spread / 2
+        engine = self.engine
+        series = self.replay.series
+        rows = self._rows
+        clock = self.clock
+        count = 0
+        for close_time, market, row in islice(self._events, max_events):
+            clock.advance_to(close_time)
+            rows[market] = row
+            candles = series[market]
+            if engine.has_orders(market):
+                rate = candles.O[row]
+                engine.on_ticker(market, rate * (1 - half_spread), rate * (1 + half_spread))
+                engine.on_range(market, candles.L[row] * (1 + half_spread), candles.H[row] * (1 - half_spread))
+            rate = candles.C[row]
+            engine.on_ticker(market, rate * (1 - half_spread), rate * (1 + half_spread))
+            count += 1
+            if on_candle is not None:
+                on_candle(self, market, candles[row])
+        self.events += count
+        return count
+
+    def _new_order(self, market, quantity, rate, order_type) -> Tuple[Any, Optional[str]]:
+        """Place an order, and record the last close of its market as arrival price to measure slippage"""
+        err, order_uuid = super()._new_order(market, quantity, rate, order_type)
+        if not err:
+            row = self._rows.get(market)
+            self.arrival_prices[order_uuid] = self.replay.series[market].C[row] if row is not None else rate
+        return err, order_uuid
+
+    def _closed(self, market: str) -> Tuple[Any, Optional[CandleSeries]]:
+        """Candles of a market which closed before the clock"""
+        candles = self.replay.series.get(market)
+        if candles is None:
+            return f'{market} is not replayed', None
+        row = self._rows.get(market)
+        if row is None:
+            return f'No candle of {market} closed yet', None
+        return False, candles[:row + 1]
+
+    def _format_time(self, time: float) -> str:
+        return (_EPOCH + timedelta(seconds=time)).strftime(self.DATETIME_PARSE_FORMAT)
+
+    def get_ticker(self, market: str) -> Tuple[Any, Optional[BittrexTicker]]:
+        err, candles = self._closed(market)
+        if err:
+            return err, None
+        last = candles.C[-1]
+        return err, BittrexTicker(Bid=last * (1 - self.spread / 2), Ask=last * (1 + self.spread / 2), Last=last)
+
+    def get_orderbook(self, market, order_type='both') -> Tuple[Any, Optional[BittrexOrderBook]]:
+        """Order book of one level per side at the bid and ask, as deep as the volume of the last candle"""
+        err, ticker = self.get_ticker(market)
+        if err:
+            return err, None
+        volume = self.replay.series[market].V[self._rows[market]]
+        buy = [dict(Quantity=volume, Rate=ticker.Bid)] if order_type in ('buy', 'both') else []
+        sell = [dict(Quantity=volume, Rate=ticker.Ask)] if order_type in ('sell', 'both') else []
+        return err, BittrexOrderBook(buy=buy, sell=sell)
+
+    def get_candles(self, market_name: str, tick_interval: str,
+                    as_arrays: bool = False) -> Tuple[Any, Union[List[BittrexCandle], CandleSeries]]:
+        err, candles = self._closed(market_name)
+        if not err and tick_interval != candles.tick_interval:
+            try:
+                candles = candles.resample(tick_interval)
+            except (KeyError, ValueError) as exception1:
+                err = str(exception1)
+        if as_arrays:
+            return err, candles if not err else CandleSeries(tick_interval=tick_interval)
+        if err:
+            return err, []
+        return err, [BittrexCandle(O=candles.O[row], H=candles.H[row], L=candles.L[row], C=candles.C[row],
+                                   V=candles.V[row], BV=candles.BV[row], T=self._format_time(candles.T[row]))
+                     for row in range(len(candles))]
+
+    def get_latest_candle(self, market_name, tick_interval) -> Tuple[Any, List[BittrexCandle]]:
+        err, candles = self.get_candles(market_name, tick_interval)
+        return err, candles[-1:]
+
+    def get_market_summaries(self, max_age: Optional[float] = None) -> Tuple[Any, List[BittrexMarketSummary]]:
+        summaries = []
+        for market in self._rows:
+            err, ticker = self.get_ticker(market)
+            candles = self.replay.series[market]
+            row = self._rows[market]
+            summaries.append(BittrexMarketSummary(MarketName=market, High=candles.H[row], Low=candles.L[row],
+                                                  Volume=candles.V[row], BaseVolume=candles.BV[row], Last=ticker.Last,
+                                                  Bid=ticker.Bid, Ask=ticker.Ask,
+                                                  TimeStamp=self._format_time(self.clock.time)))
+        return False, summaries
+
+    def snapshot(self, max_age: float = 1.0) -> Tuple[Any, dict]:
+        """Summaries at the clock, max_age is ignored since the clock only moves between candles"""
+        return self.get_market_summaries_dict()
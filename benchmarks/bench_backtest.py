@@ -0,0 +1,94 @@
+"""
+Measure replay throughput of Backtrex in candles per second, with and without a strategy placing paper orders.
+
+Random-walk one-minute candles are written to a CandleStore in a temporary directory and replayed memory-mapped
+from it. The strategy run is repeated to check that a replay is deterministic.
+
+Usage: python benchmarks/bench_backtest.py [markets] [days]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+START = 1546300800.0  # 2019-01-01
+
+
+def random_walk(seed: int, rows: int):
+    from candles import CandleSeries
+
+    rnd = random.Random(seed)
+    T, O, H, L, C, V, BV = (array('d') for _ in range(7))
+    price = 0.01
+    for row in range(rows):
+        close = price * (1 + rnd.gauss(0, 0.002))
+        T.append(START + row * 60)
+        O.append(price)
+        H.append(max(price, close) * (1 + abs(rnd.gauss(0, 0.001))))
+        L.append(min(price, close) * (1 - abs(rnd.gauss(0, 0.001))))
+        C.append(close)
+        V.append(rnd.uniform(10, 100))
+        BV.append(V[-1] * close)
+        price = close
+    return CandleSeries(T, O, H, L, C, V, BV, tick_interval='onemin')
+
+
+def dip_buyer(client, market, candle):
+    """Keep one buy 0.5% under the close of every market, and sell what was bought 0.5% over the close"""
+    if client.engine.has_orders(market):
+        return
+    close = candle['C']
+    err, balance = client.get_balance(market[4:])
+    if balance.Available > 0:
+        client.sell_limit(market, balance.Available, close * 1.005)
+    else:
+        client.buy_limit(market, 1.0, close * 0.995)
+
+
+def run(replay_factory, on_candle):
+    from backtest import Backtrex
+
+    client = Backtrex(replay_factory(), initial_balances={'BTC': 10.0}, spread=0.001)
+    started = time.perf_counter()
+    events = client.run(on_candle)
+    elapsed = time.perf_counter() - started
+    err, balances = client.get_balances()
+    return events, elapsed, {balance.Currency: round(balance.Balance, 10) for balance in balances}, client
+
+
+def main():
+    markets = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    from backtest import Replay
+    from candlestore import CandleStore
+
+    names = [f'BTC-C{i}' for i in range(markets)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = CandleStore(directory)
+        for seed, market in enumerate(names):
+            store.append(market, 'onemin', random_walk(seed, days * 24 * 60))
+
+        def replay():
+            return Replay.from_store(store, names, 'onemin')
+
+        events, elapsed, _, _ = run(replay, None)
+        print(f'{markets} markets x {days} days of onemin candles: {events:,} candles')
+        print(f'replay only          {elapsed:8.2f} s {events / elapsed:12,.0f} candles/s')
+
+        events, elapsed, balances, client = run(replay, dip_buyer)
+        err, orders = client.get_orders()
+        print(f'replay with strategy {elapsed:8.2f} s {events / elapsed:12,.0f} candles/s, '
+              f'{len(orders):,} orders, BTC {balances["BTC"]:.8f}')
+
+        _, _, again, _ = run(replay, dip_buyer)
+        print('deterministic' if again == balances else 'NOT DETERMINISTIC')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare Prodict decoding with fast_decode records on getmarketsummaries and getorderhistory sized payloads,
+and the size and attribute access speed of a single response object.
+
+Usage: python benchmarks/bench_decode.py
+"""
+import json
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bittrex import BittrexMarketSummary, BittrexOrderHistory, RECORD_TYPES  # noqa: E402
+from records import loads  # noqa: E402
+
+
+def market_summaries(n):
+    return [dict(MarketName=f'BTC-C{i}', High=1.1, Low=0.9, Volume=1000.0 + i, Last=1.0, BaseVolume=10.0,
+                 TimeStamp='2019-06-30T12:00:00.123', Bid=0.99, Ask=1.01, OpenBuyOrders=10, OpenSellOrders=12,
+                 PrevDay=0.95, Created='2017-01-01T00:00:00') for i in range(n)]
+
+
+def order_history(n):
+    return [dict(OrderUuid=f'uuid-{i}', Exchange='BTC-LTC', TimeStamp='2019-06-30T12:00:00.123',
+                 OrderType='LIMIT_BUY', Limit=0.01, Quantity=10.0, QuantityRemaining=0.0, Commission=0.00001,
+                 Price=0.1, PricePerUnit=0.01, IsConditional=False, Condition=None, ConditionTarget=None,
+                 ImmediateOrCancel=False) for i in range(n)]
+
+
+def prodict_decode(payload, cls):
+    return [cls.from_dict(item) for item in json.loads(payload)['result']]
+
+
+def fast_decode(payload, cls):
+    return RECORD_TYPES[cls].from_dicts(loads(payload)['result'])
+
+
+def measure(decode, payload, cls, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(payload, cls)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    result = decode(payload, cls)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, size
+
+
+def per_object(cls, item):
+    prodict_obj = cls.from_dict(item)
+    record = RECORD_TYPES[cls].from_dict(item)
+    prodict_size = sys.getsizeof(prodict_obj) + sys.getsizeof(prodict_obj.__dict__)
+    record_size = sys.getsizeof(record)
+    prodict_access = min(timeit.repeat(lambda: prodict_obj.Quantity, number=200000, repeat=3)) / 200000
+    record_access = min(timeit.repeat(lambda: record.Quantity, number=200000, repeat=3)) / 200000
+    print(f'{cls.__name__} object')
+    print(f'  prodict: {prodict_size:6d} bytes {prodict_access * 1e9:6.1f} ns per .Quantity')
+    print(f'  records: {record_size:6d} bytes {record_access * 1e9:6.1f} ns per .Quantity')
+
+
+def check_get_tickers():
+    """get_tickers builds ticker records from the summaries snapshot when fast_decode is on"""
+    from bittrex import Bittrex, BittrexTickerRecord
+    from cache import QueryCache
+    from transport import CallbackTransport
+
+    payload = json.dumps({'success': True, 'message': '', 'result': market_summaries(3)})
+    client = Bittrex('key', 'secret', fast_decode=True, transport=CallbackTransport(lambda url, headers: payload),
+                     cache=QueryCache(), lazy=True, headless=True)
+    err, tickers = client.get_tickers(max_age=0)
+    ticker = tickers['BTC-C0']
+    assert not err and isinstance(ticker, BittrexTickerRecord), (err, ticker)
+    assert (ticker.Bid, ticker.Ask, ticker.Last) == (0.99, 1.01, 1.0), ticker
+    print(f'get_tickers(fast_decode=True): {len(tickers)} {type(ticker).__name__}, ok')
+
+
+def main():
+    cases = [('getmarketsummaries', BittrexMarketSummary, market_summaries(300), 50),
+             ('getorderhistory', BittrexOrderHistory, order_history(10000), 3)]
+    for name, cls, items, repeat in cases:
+        payload = json.dumps({'success': True, 'message': '', 'result': items}).encode()
+        slow_time, slow_size = measure(prodict_decode, payload, cls, repeat)
+        fast_time, fast_size = measure(fast_decode, payload, cls, repeat)
+        print(f'{name} ({len(items)} records)')
+        print(f'  prodict: {slow_time * 1000:9.2f} ms {slow_size / 1024:9.0f} KiB')
+        print(f'  records: {fast_time * 1000:9.2f} ms {fast_size / 1024:9.0f} KiB')
+        print(f'  speedup: {slow_time / fast_time:9.1f}x  memory: {slow_size / fast_size:.1f}x smaller')
+    per_object(BittrexOrderHistory, order_history(1)[0])
+    check_get_tickers()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure import time of the bittrex module and construction time of a lazy, headless Bittrex instance, compared
+with the eager construction which downloads market info before returning.
+
+Requests are answered by a local transport which waits `LATENCY` seconds per request, like a round trip would.
+Construction in lazy mode must not send any request.
+
+Usage: python benchmarks/bench_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LATENCY = 0.1
+MARKETS = [dict(MarketCurrency=f'C{i}', BaseCurrency='BTC', MarketCurrencyLong=f'Coin {i}', BaseCurrencyLong='Bitcoin',
+                MinTradeSize=0.01, MarketName=f'BTC-C{i}', IsActive=True, Created='2017-01-01T00:00:00',
+                Notice=None, IsSponsored=None, LogoUrl=None) for i in range(300)]
+
+
+def import_time(runs=5):
+    code = 'import time; started = time.perf_counter(); import bittrex; print(time.perf_counter() - started)'
+    times = [float(subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout) for _ in range(runs)]
+    return min(times)
+
+
+def main():
+    print(f'import bittrex                    {import_time() * 1000:8.2f} ms (best of 5, fresh interpreter)')
+
+    from bittrex import Bittrex
+    from cache import QueryCache
+    from transport import CallbackTransport
+
+    requests_sent = []
+
+    def handler(url, headers):
+        requests_sent.append(url)
+        time.sleep(LATENCY)
+        if '/getticker?' in url:
+            return json.dumps(dict(success=True, message='', result=dict(Bid=1.0, Ask=1.1, Last=1.05)))
+        return json.dumps(dict(success=True, message='', result=MARKETS))
+
+    transport = CallbackTransport(handler)
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, 'markets.json')
+
+        runs = 1000
+        started = time.perf_counter()
+        for _ in range(runs):
+            client = Bittrex('key', 'secret', transport=transport, lazy=True, headless=True,
+                             market_info_path=snapshot, cache=QueryCache())
+        elapsed = (time.perf_counter() - started) / runs
+        print(f'Bittrex(lazy=True, headless=True) {elapsed * 1000:8.3f} ms, {len(requests_sent)} requests')
+
+        started = time.perf_counter()
+        client.market_info
+        print(f'first market_info, download       {(time.perf_counter() - started) * 1000:8.2f} ms, '
+              f'{len(requests_sent)} requests, snapshot written')
+
+        client = Bittrex('key', 'secret', transport=transport, lazy=True, headless=True, market_info_path=snapshot,
+                         cache=QueryCache())
+        requests_sent.clear()
+        started = time.perf_counter()
+        client.market_info
+        print(f'first market_info, from snapshot  {(time.perf_counter() - started) * 1000:8.2f} ms, '
+              f'{len(requests_sent)} requests')
+
+        requests_sent.clear()
+        started = time.perf_counter()
+        Bittrex('key', 'secret', transport=transport, http_keep_alive=True, headless=True, cache=QueryCache())
+        print(f'Bittrex(http_keep_alive=True)     {(time.perf_counter() - started) * 1000:8.2f} ms, '
+              f'{len(requests_sent)} requests (eager, previous behaviour)')
+
+
+if __name__ == '__main__':
+    main()
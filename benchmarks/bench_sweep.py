@@ -0,0 +1,73 @@
+"""
+Measure how a parameter sweep of Backtrex runs scales with worker processes.
+
+Random-walk one-minute candles are written once to a CandleStore in a temporary directory. Workers memory-map them,
+so adding processes does not add copies of the market data. The same grid is swept with 1 process and with all
+CPUs, and the result table of the parallel sweep is printed.
+
+Usage: python benchmarks/bench_sweep.py [markets] [days]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_backtest import random_walk  # noqa: E402
+
+GRID = dict(dip=[0.002, 0.005, 0.01, 0.02], take_profit=[0.002, 0.005, 0.01, 0.02])
+
+
+def dip_buyer(params):
+    """Keep one buy `dip` under the close of every market, and sell what was bought `take_profit` over the close"""
+    dip = params['dip']
+    take_profit = params['take_profit']
+
+    def on_candle(client, market, candle):
+        if client.engine.has_orders(market):
+            return
+        close = candle['C']
+        err, balance = client.get_balance(market[4:])
+        if balance.Available > 0:
+            client.sell_limit(market, balance.Available, close * (1 + take_profit))
+        else:
+            client.buy_limit(market, 1.0, close * (1 - dip))
+
+    return on_candle
+
+
+def main():
+    markets = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    from candlestore import CandleStore
+    from sweep import expand_grid, format_table, sweep
+
+    names = [f'BTC-C{i}' for i in range(markets)]
+    runs = len(expand_grid(GRID))
+    cpus = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        store = CandleStore(directory)
+        for seed, market in enumerate(names):
+            store.append(market, 'onemin', random_walk(seed, days * 24 * 60))
+
+        timings = {}
+        for processes in sorted({1, cpus}):
+            started = time.perf_counter()
+            results = sweep(directory, names, 'onemin', dip_buyer, GRID, {'BTC': 10.0}, spread=0.001,
+                            processes=processes)
+            timings[processes] = time.perf_counter() - started
+            events = sum(result.events for result in results)
+            print(f'{runs} runs, {processes:2d} processes {timings[processes]:8.2f} s '
+                  f'{events / timings[processes]:12,.0f} candles/s')
+
+        if cpus > 1:
+            print(f'speedup with {cpus} processes: {timings[1] / timings[cpus]:.2f}x')
+        print()
+        print(format_table(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare Bittrex timestamp parsing with the former strptime implementation.
+
+Usage: python benchmarks/bench_timeparse.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeparse import parse_dt, to_epoch_column, _parse  # noqa: E402
+
+
+def strptime_parse(s):
+    if "." in s:
+        s = s.split(".")[0]
+    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S")
+
+
+def timestamps(n):
+    start = datetime(2019, 1, 1)
+    return [(start + timedelta(seconds=37 * i, milliseconds=i % 1000)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:23]
+            for i in range(n)]
+
+
+def run(name, func, values, baseline=None):
+    start = time.perf_counter()
+    func(values)
+    elapsed = time.perf_counter() - start
+    speedup = f'{baseline / elapsed:6.1f}x' if baseline else '      '
+    print(f'  {name:28s} {elapsed * 1e9 / len(values):8.0f} ns per timestamp {speedup}')
+    return elapsed
+
+
+def main():
+    values = timestamps(200000)
+    repeated = values[:100] * 2000
+    print(f'{len(values)} distinct timestamps')
+    baseline = run('strptime (previous)', lambda v: [strptime_parse(s) for s in v], values)
+    run('parse_dt, uncached', lambda v: [_parse(s) for s in v], values, baseline)
+    run('to_epoch_column', to_epoch_column, values, baseline)
+    try:
+        from timeparse import to_datetime64
+        run('to_datetime64 (numpy)', to_datetime64, values, baseline)
+    except ImportError:
+        print('  to_datetime64 skipped, numpy is not installed')
+
+    print(f'{len(repeated)} timestamps, 100 distinct (open orders polled every tick)')
+    baseline = run('strptime (previous)', lambda v: [strptime_parse(s) for s in v], repeated)
+    run('parse_dt, cached', lambda v: [parse_dt(s) for s in v], repeated, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Stress Papertrex with many client threads placing, canceling and reading paper orders while feeder threads match
+them against random tickers and order books, then check that every order ended in a consistent state.
+
+Checked invariants:
+- no fill is applied to an order after its cancel succeeded, or after it was filled
+- no order is filled for more than its quantity
+- filled quantity, Price and QuantityRemaining of every order agree with the fills applied to it
+- an order is listed by get_open_orders if and only if it is open, and the matching engine holds exactly those orders
+- balances equal the initial balances moved by the fills, and no more and no less than the open orders is reserved
+
+The exit status is 1 when an invariant is broken, so the script can be run as a check.
+
+Usage: python benchmarks/stress_papertrex.py [clients] [orders per client]
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MARKET_NAMES = [f'BTC-C{i}' for i in range(8)]
+MARKETS = [dict(MarketCurrency=name[4:], BaseCurrency='BTC', MarketName=name, MinTradeSize=0.01, IsActive=True)
+           for name in MARKET_NAMES]
+FEEDERS = 4
+INITIAL_BALANCES = dict({'BTC': 1e6}, **{name[4:]: 1e6 for name in MARKET_NAMES})
+TOLERANCE = 1e-6
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    orders_per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    from cache import QueryCache
+    from orderbook import LocalOrderBook
+    from papertrex import Papertrex
+    from transport import CallbackTransport
+
+    transport = CallbackTransport(lambda url, headers: json.dumps(dict(success=True, message='', result=MARKETS)))
+    paper = Papertrex('key', 'secret', transport=transport, headless=True, cache=QueryCache(), match_interval=0,
+                      closed_order_retention=None, initial_balances=INITIAL_BALANCES)
+
+    fills = defaultdict(list)
+    violations = []
+    apply_fill = paper.engine.on_fill
+
+    def checked_fill(order, quantity, rate):
+        if order.CancelInitiated or not order.IsOpen:
+            violations.append(f'fill of closed order {order.OrderUuid}')
+        if quantity <= 0 or quantity > order.QuantityRemaining * (1 + 1e-12):
+            violations.append(f'fill of {quantity} for {order.QuantityRemaining} remaining of {order.OrderUuid}')
+        fills[order.OrderUuid].append((quantity, rate))
+        apply_fill(order, quantity, rate)
+
+    paper.engine.on_fill = checked_fill
+
+    done = threading.Event()
+    canceled = {}
+    operations = [0] * clients
+
+    def client(number):
+        rnd = random.Random(number)
+        placed = []
+        for _ in range(orders_per_client):
+            market = rnd.choice(MARKET_NAMES)
+            rate = rnd.uniform(0.9, 1.1)
+            quantity = rnd.uniform(0.01, 3)
+            if rnd.random() < 0.5:
+                err, response = paper.buy_limit(market, quantity, rate)
+            else:
+                err, response = paper.sell_limit(market, quantity, rate)
+            operations[number] += 1
+            if err:
+                violations.append(f'order rejected: {err}')
+                continue
+            placed.append(response.uuid)
+            if rnd.random() < 0.4:
+                uuid = rnd.choice(placed)
+                err, ok = paper.cancel(uuid)
+                if ok:
+                    err, order = paper.get_order(uuid)
+                    canceled[uuid] = (order.Price, order.QuantityRemaining)
+                operations[number] += 2
+            if rnd.random() < 0.2:
+                paper.get_open_orders(rnd.choice(MARKET_NAMES))
+                operations[number] += 1
+
+    def feeder(number):
+        rnd = random.Random(1000 + number)
+        while not done.is_set():
+            market = rnd.choice(MARKET_NAMES)
+            mid = rnd.uniform(0.9, 1.1)
+            if rnd.random() < 0.7:
+                paper.engine.on_ticker(market, mid * 0.999, mid * 1.001)
+            else:
+                book = LocalOrderBook(market)
+                for level in range(5):
+                    book.bids.set(mid * (0.999 - level * 0.002), rnd.uniform(0.1, 2))
+                    book.asks.set(mid * (1.001 + level * 0.002), rnd.uniform(0.1, 2))
+                paper.engine.on_orderbook(market, book)
+
+    feeders = [threading.Thread(target=feeder, args=(number,)) for number in range(FEEDERS)]
+    workers = [threading.Thread(target=client, args=(number,)) for number in range(clients)]
+    started = time.perf_counter()
+    for thread in feeders + workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in feeders:
+        thread.join()
+
+    for uuid, (price, remaining) in canceled.items():
+        err, order = paper.get_order(uuid)
+        if (order.Price, order.QuantityRemaining) != (price, remaining):
+            violations.append(f'order {uuid} changed after cancel')
+
+    err, orders = paper.get_orders()
+    balances = defaultdict(float, INITIAL_BALANCES)
+    reserved = defaultdict(float)
+    for order in orders:
+        filled = sum(quantity for quantity, _ in fills[order.OrderUuid])
+        price = sum(quantity * rate for quantity, rate in fills[order.OrderUuid])
+        if filled > order.Quantity * (1 + 1e-12):
+            violations.append(f'order {order.OrderUuid} filled {filled} of {order.Quantity}')
+        if abs(order.Quantity - order.QuantityRemaining - filled) > 1e-9 or abs(order.Price - price) > 1e-9:
+            violations.append(f'order {order.OrderUuid} does not match its fills')
+        if order.IsOpen == (order.QuantityRemaining == 0 or order.CancelInitiated):
+            violations.append(f'order {order.OrderUuid} has an inconsistent state')
+
+        base_currency, currency = order.Exchange.split('-')
+        commission = price * paper.COMMISSION_RATE
+        if order.Type.endswith('BUY'):
+            balances[base_currency] -= price + commission
+            balances[currency] += filled
+            if order.IsOpen:
+                reserved[base_currency] += order.QuantityRemaining * order.Limit * (1 + paper.COMMISSION_RATE)
+        else:
+            balances[currency] -= filled
+            balances[base_currency] += price - commission
+            if order.IsOpen:
+                reserved[currency] += order.QuantityRemaining
+
+    for balance in paper.get_balances()[1]:
+        if abs(balance.Balance - balances[balance.Currency]) > TOLERANCE:
+            violations.append(f'{balance.Currency} balance {balance.Balance:.8f}, '
+                              f'expected {balances[balance.Currency]:.8f} from the fills')
+        held = balance.Balance - balance.Available
+        if abs(held - reserved[balance.Currency]) > TOLERANCE:
+            violations.append(f'{balance.Currency} reserved {held:.8f}, '
+                              f'open orders hold {reserved[balance.Currency]:.8f}')
+
+    open_uuids = {order.OrderUuid for order in paper.get_open_orders()[1]}
+    expected = {order.OrderUuid for order in orders if order.IsOpen}
+    if open_uuids != expected or len(paper.engine) != len(expected):
+        violations.append(f'open orders {len(open_uuids)}, engine {len(paper.engine)}, expected {len(expected)}')
+
+    filled_orders = sum(1 for order in orders if order.QuantityRemaining == 0)
+    print(f'{clients} clients, {FEEDERS} feeders, {len(orders)} orders in {elapsed:.2f} s, '
+          f'{sum(operations) / elapsed:,.0f} operations/s')
+    print(f'{filled_orders} filled, {len(canceled)} canceled, {len(expected)} open, '
+          f'{sum(len(order_fills) for order_fills in fills.values())} fills')
+    for violation in violations[:20]:
+        print('VIOLATION', violation)
+    print('OK' if not violations else f'{len(violations)} violations')
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
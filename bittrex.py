@@ -1,13 +1,31 @@
-from typing import Any, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterator, List, Tuple, Optional, Union
+import json
+import os
+import threading
 import traceback
 from urllib.parse import urlencode
 import time
 import hmac
 import hashlib
-import requests
 from prodict import Prodict
 from datetime import datetime
 
+from bulk import BulkOrder, BulkOrderResult, BulkExecution
+from cache import QueryCache, CacheStats
+from jsonstream import JsonArrayStream
+from markets import MarketIndex, to_market_name, split_market_name
+from candles import CandleSeries
+from orderbook import LocalOrderBook
+from metrics import QueryMetrics, QueryEvent
+from ratelimit import RateLimiter
+from scheduler import RequestScheduler, SchedulerStats
+from records import record_type, loads
+from timeparse import parse_dt
+from transport import Transport, RequestsTransport, TransportStats
+from valuation import ConversionGraph, Valuation
+
 
 # region ENUMS
 class BittrexFillType:
@@ -251,10 +269,89 @@ class BittrexCandle(Prodict):
 
 # endregion
 
+# region RECORDS
+
+BittrexBalanceRecord = record_type(BittrexBalance)
+BittrexBuyLimitRecord = record_type(BittrexBuyLimit)
+BittrexCandleRecord = record_type(BittrexCandle)
+BittrexCurrencyRecord = record_type(BittrexCurrency)
+BittrexDepositAddressRecord = record_type(BittrexDepositAddress)
+BittrexMarketRecord = record_type(BittrexMarket)
+BittrexMarketHistoryRecord = record_type(BittrexMarketHistory)
+BittrexMarketSummaryRecord = record_type(BittrexMarketSummary)
+BittrexOpenOrderRecord = record_type(BittrexOpenOrder)
+BittrexOrderRecord = record_type(BittrexOrder)
+BittrexQuantityRateRecord = record_type(BittrexQuantityRate)
+BittrexOrderBookRecord = record_type(BittrexOrderBook,
+                                     nested=dict(buy=BittrexQuantityRateRecord, sell=BittrexQuantityRateRecord))
+BittrexOrderHistoryRecord = record_type(BittrexOrderHistory)
+BittrexSellLimitRecord = record_type(BittrexSellLimit)
+BittrexTickerRecord = record_type(BittrexTicker)
+BittrexWithdrawRecord = record_type(BittrexWithdraw)
+BittrexWithdrawalDepositHistoryRecord = record_type(BittrexWithdrawalDepositHistory)
+
+RECORD_TYPES = {
+    BittrexBalance: BittrexBalanceRecord,
+    BittrexBuyLimit: BittrexBuyLimitRecord,
+    BittrexCandle: BittrexCandleRecord,
+    BittrexCurrency: BittrexCurrencyRecord,
+    BittrexDepositAddress: BittrexDepositAddressRecord,
+    BittrexMarket: BittrexMarketRecord,
+    BittrexMarketHistory: BittrexMarketHistoryRecord,
+    BittrexMarketSummary: BittrexMarketSummaryRecord,
+    BittrexOpenOrder: BittrexOpenOrderRecord,
+    BittrexOrder: BittrexOrderRecord,
+    BittrexOrderBook: BittrexOrderBookRecord,
+    BittrexOrderHistory: BittrexOrderHistoryRecord,
+    BittrexQuantityRate: BittrexQuantityRateRecord,
+    BittrexSellLimit: BittrexSellLimitRecord,
+    BittrexTicker: BittrexTickerRecord,
+    BittrexWithdraw: BittrexWithdrawRecord,
+    BittrexWithdrawalDepositHistory: BittrexWithdrawalDepositHistoryRecord,
+}
+
+
+def compact(response):
+    """
+    Convert Prodict responses to compact records, e.g. before keeping many of them around.
+    Lists and dict values are converted item by item, anything else is returned as is.
+
+    :param response: Prodict response, or list or dict of them
+    :return: record, or list or dict of records
+    """
+    if isinstance(response, list):
+        return [compact(item) for item in response]
+    record = RECORD_TYPES.get(type(response))
+    if record is not None:
+        return record.from_dict(response)
+    if isinstance(response, dict) and not isinstance(response, Prodict):
+        return {key: compact(value) for key, value in response.items()}
+    return response
+
+# endregion
+
+# method -> (url, rate limit group, signed)
+ENDPOINTS = {}
+for _method in ('getmarkets', 'getcurrencies', 'getticker', 'getmarketsummaries', 'getmarketsummary', 'getorderbook',
+                'getmarkethistory'):
+    ENDPOINTS[_method] = ('https://bittrex.com/api/v1.1/public/' + _method + '?', 'public', False)
+for _method in ('buylimit', 'buymarket', 'selllimit', 'sellmarket', 'cancel', 'getopenorders'):
+    ENDPOINTS[_method] = ('https://bittrex.com/api/v1.1/market/' + _method + '?', 'market', True)
+for _method in ('getbalances', 'getbalance', 'getdepositaddress', 'withdraw', 'getorder', 'getorderhistory',
+                'getwithdrawalhistory', 'getdeposithistory'):
+    ENDPOINTS[_method] = ('https://bittrex.com/api/v1.1/account/' + _method + '?', 'account', True)
+# https://bittrex.com/api/v2.0/pub/market/getticks?marketname=USDT-BTC&tickinterval=day
+# https://bittrex.com/api/v2.0/pub/market/getlatesttick?marketName=BTC-NEO&tickInterval=onemin
+for _method in ('getticks', 'getlatesttick'):
+    ENDPOINTS[_method] = ('https://bittrex.com/api/v2.0/pub/market/' + _method + '?', 'public', False)
+del _method
+
 
 class Bittrex:
     __shared_instance = None
     DATETIME_PARSE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+    # seconds to wait before downloading market info again after a failed download
+    MARKET_INFO_RETRY = 60
 
     # FILL_TYPES = BittrexFillType
     # ORDER_TYPES = BittrexOrderType
@@ -281,32 +378,40 @@ class Bittrex:
     # WithdrawalHistory = BittrexWithdrawalDepositHistory
 
     def __init__(self, apikey: str, secret: str, rate_limit: int = 5, account_name: str = 'NOT_PRIVODED',
-                 http_keep_alive: bool = False, understood=""):
+                 http_keep_alive: bool = False, understood="", rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[QueryCache] = None, fast_decode: bool = False,
+                 transport: Optional[Transport] = None, metrics: Optional[QueryMetrics] = None,
+                 scheduler: Optional[RequestScheduler] = None, lazy: bool = False,
+                 market_info_path: Optional[str] = None, headless: bool = False):
 
         self.account_name = account_name
-        # https://bittrex.com/Api/v2.0/pub/market/getticks?marketName=USDT-BTC&tickInterval=day
-        # https://bittrex.com/api/v2.0/pub/market/getlatesttick?marketName=BTC-NEO&tickInterval=onemin
-        self._api20 = ['getticks', 'getlatesttick']
-        self._public = ['getmarkets', 'getcurrencies', 'getticker', 'getmarketsummaries', 'getmarketsummary',
-                        'getorderbook', 'getmarkethistory']
-        self._market = ['buylimit', 'buymarket', 'selllimit', 'sellmarket', 'cancel', 'getopenorders']
-        self._account = ['getbalances', 'getbalance', 'getdepositaddress', 'withdraw', 'getorder', 'getorderhistory',
-                         'getwithdrawalhistory', 'getdeposithistory']
 
         self.http_keep_alive = http_keep_alive
+        self.fast_decode = fast_decode
+        self._transport = transport
+        self.metrics = metrics or QueryMetrics()
 
         self.key = apikey
         self.rate_limit = rate_limit
+        self.rate_limiter = rate_limiter or RateLimiter(rate_limit)
+        self.scheduler = scheduler or RequestScheduler(self.rate_limiter)
+        self.cache = cache or QueryCache.shared(transport)
         self.secret = secret
         self.last_call = None
         self.timeout = 15
+        self._summaries_snapshot: Optional[Tuple[float, dict]] = None
+        self._conversion_graph: Optional[Tuple[dict, ConversionGraph]] = None
+        self.market_info_path = market_info_path
+        self._market_info: Optional[dict] = None
+        self._market_index: Optional[Tuple[dict, MarketIndex]] = None
+        self._market_info_lock = threading.Lock()
+        self._market_info_retry_at = 0.0
 
-        self.calls = []
-
-        print('Bittrex API instance started for "{}".'.format(self.account_name))
-        print('This is RISKY! You may lose money. Know what you are doing!')
+        if not headless:
+            print('Bittrex API instance started for "{}".'.format(self.account_name))
+            print('This is RISKY! You may lose money. Know what you are doing!')
 
-        warn = False if understood == 'understood' else True
+        warn = not headless and understood != 'understood'
 
         while warn:
             answer = input('Type "quit" to exit or "understood" to continue:')
@@ -316,93 +421,332 @@ class Bittrex:
                 exit(0)
 
         self.warmed = False
-        if self.http_keep_alive:
-            self.requests_session = requests.Session()
+        if self.http_keep_alive and not lazy:
             self._warm_up()
 
         Bittrex.__shared_instance = self
-        self.market_info = None
+        if not lazy:
+            self._load_market_info()
+
+    @property
+    def transport(self) -> Transport:
+        """Transport to send requests with, a pooled keep-alive RequestsTransport is created on first use by default"""
+        if self._transport is None:
+            self._transport = RequestsTransport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: Transport):
+        self._transport = transport
+
+    @property
+    def market_info(self) -> Optional[dict]:
+        """
+        Markets by MarketName, loaded on first access. None if they could not be loaded, in which case they are
+        not downloaded again before MARKET_INFO_RETRY seconds passed, so orders are not slowed down by retries.
+
+        :return: dict of MarketName -> BittrexMarket
+        """
+        if self._market_info is None and time.monotonic() >= self._market_info_retry_at:
+            self._load_market_info()
+        return self._market_info
+
+    @market_info.setter
+    def market_info(self, market_info: Optional[dict]):
+        self._market_info = market_info
+
+    def _load_market_info(self):
+        with self._market_info_lock:
+            if self._market_info is not None or time.monotonic() < self._market_info_retry_at:
+                return
+            path = self.market_info_path
+            if path and os.path.exists(path):
+                with open(path, 'rb') as f:
+                    snapshot = loads(f.read())
+                self._market_info = {name: self._decode(BittrexMarket, market) for name, market in snapshot.items()}
+                return
+
+            err, market_info = self.get_markets_dict()
+            if err:
+                print(f"Error on bittrex_api.markets_dict:{err}")
+                self._market_info_retry_at = time.monotonic() + self.MARKET_INFO_RETRY
+                return
+            self._market_info = market_info
+            if path:
+                self.save_market_info(path)
+
+    @property
+    def market_index(self) -> Optional[MarketIndex]:
+        """
+        Lookup tables over market_info, rebuilt only when market_info changes
+
+        :return: MarketIndex, None if market info is not loaded
+        """
+        market_info = self.market_info
+        if market_info is None:
+            return None
+        index = self._market_index
+        if index is None or index[0] is not market_info:
+            index = self._market_index = (market_info, MarketIndex(market_info))
+        return index[1]
+
+    def validate_order(self, market: str, quantity: float, rate: Optional[float] = None) -> Optional[str]:
+        """
+        Check that a market exists and is active, and that quantity is not below its MinTradeSize.
+        Orders are not checked when market info could not be loaded.
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param quantity: amount to buy or sell
+        :param rate: limit rate
+        :return: error message, None if the order is valid
+        """
+        index = self.market_index
+        if index is None:
+            return None
+        return index.validate_order(market, quantity, rate)
+
+    def save_market_info(self, path: Optional[str] = None):
+        """
+        Write market_info to a JSON snapshot, for fast startup of later instances
+
+        :param path: snapshot file, defaults to market_info_path
+        """
+        path = path or self.market_info_path
+        market_info = self._market_info
+        if not path or market_info is None:
+            return
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({name: market.to_dict() for name, market in market_info.items()}, f)
+        os.replace(temporary, path)
+
+    def refresh_market_info(self) -> Tuple[Any, Optional[dict]]:
+        """
+        Download market_info again and update the snapshot file, if any. The cached getmarkets result is dropped
+        first, so the markets are always downloaded.
+
+        :return: error(if any), dict of MarketName -> BittrexMarket
+        """
+        self.cache.invalidate('getmarkets')
         err, market_info = self.get_markets_dict()
         if err:
-            print(f"Error on bittrex_api.markets_dict:{err}")
-        else:
-            self.market_info = market_info
+            return err, None
+        self._market_info = market_info
+        self._market_info_retry_at = 0.0
+        self.save_market_info()
+        return err, market_info
 
-    def _query(self, method, values=None) -> Tuple[Any, Optional[BittrexAPIResponse]]:
+    def _query(self, method, values=None, max_age: Optional[float] = None) -> Tuple[Any, Optional[BittrexAPIResponse]]:
         """
-        Actual method for sending queries to Bittrex
+        Send a query to Bittrex, or serve it from cache if the method is cached
 
         :param method: which method to call
         :param values: additional values depending on the method
+        :param max_age: serve a cached result only if it is not older than this many seconds, None for the cache ttl
         :return: error(if any), BittrexAPIResponse
         """
+        if not self.cache.caches(method):
+            return self._send_query(method, values)
+
+        key = (method, tuple(sorted(values.items()))) if values else (method,)
+        return self.cache.get(key, method, lambda: self._send_query(method, values), max_age)
+
+    def _prepare_query(self, method, values: Optional[dict], event: QueryEvent) -> Tuple[Any, Optional[str], dict]:
+        """
+        Build and sign the url of a query and wait for its turn at the rate limiter
+
+        :param method: which method to call
+        :param values: additional values depending on the method
+        :param event: QueryEvent to record sign and queue_wait times in
+        :return: error(if any), url, headers
+        """
         if values is None:
             values = {}
-        try:
-            if method in self._public:
-                url = 'https://bittrex.com/api/v1.1/public/'
-            elif method in self._market:
-                url = 'https://bittrex.com/api/v1.1/market/'
-            elif method in self._account:
-                url = 'https://bittrex.com/api/v1.1/account/'
-            elif method in self._api20:
-                url = 'https://bittrex.com/api/v2.0/pub/market/'
-            #     https://bittrex.com/api/v2.0/pub/market/getticks?marketname=USDT-BTC&tickinterval=day
-            else:
-                return True, None
-
-            url += method + '?' + urlencode(values)
-
-            if method not in self._public and method not in self._api20:
-                url += '&apikey=' + str(self.key)
-                nonce = int(time.time())
-                url += '&nonce=' + str(nonce)
-                signature = hmac.new(self.secret.encode(),
-                                     url.encode(),
-                                     hashlib.sha512).hexdigest()
-                headers = {'apisign': signature}
-                # print('nonce=', nonce)
-                # print('apisign=', signature)
-                # print('headers:', headers)
-                # print('url:', url)
-                # exit(0)
-            else:
-                headers = {}
+        started = time.perf_counter()
+        endpoint = ENDPOINTS.get(method)
+        if endpoint is None:
+            event.error = True
+            return True, None, {}
+
+        url, group, signed = endpoint
+        url += urlencode(values)
+
+        if signed:
+            url += '&apikey=' + str(self.key)
+            nonce = int(time.time())
+            url += '&nonce=' + str(nonce)
+            signature = hmac.new(self.secret.encode(),
+                                 url.encode(),
+                                 hashlib.sha512).hexdigest()
+            headers = {'apisign': signature}
+        else:
+            headers = {}
+        event.group = group
+        signed = time.perf_counter()
+        event.sign = signed - started
+
+        scheduled = self._wait_rate_limit(group, method, values.get('market') or values.get('marketname'))
+        event.queue_wait = time.perf_counter() - signed
+        if not scheduled:
+            event.error = f'{method} dropped after waiting {event.queue_wait:.3f} seconds for rate limit'
+            return event.error, None, headers
+        return False, url, headers
+
+    def _send_query(self, method, values=None) -> Tuple[Any, Optional[BittrexAPIResponse]]:
+        """
+        Actual method for sending queries to Bittrex
 
-            self._wait_rate_limit()
+        :param method: which method to call
+        :param values: additional values depending on the method
+        :return: error(if any), BittrexAPIResponse
+        """
+        event = QueryEvent(method=method)
+        try:
+            err, url, headers = self._prepare_query(method, values, event)
+            if err:
+                return err, None
 
-            self.calls.append(datetime.utcnow().timestamp())
-            if self.http_keep_alive:
-                response = self.requests_session.get(url, headers=headers, timeout=self.timeout).json()
-            else:
-                response = requests.get(url, headers=headers, timeout=self.timeout).json()
+            sent = time.perf_counter()
+            body = self.transport.get(url, headers, self.timeout)
+            received = time.perf_counter()
+            event.network = received - sent
+            event.payload_size = len(body)
 
+            response = loads(body) if self.fast_decode else json.loads(body)
             bittrexapi_response: BittrexAPIResponse = BittrexAPIResponse.from_dict(response)
+            event.decode = time.perf_counter() - received
+
             if bittrexapi_response.has_error:
+                event.error = bittrexapi_response.message
                 return bittrexapi_response.message, None
             return False, bittrexapi_response
 
         except Exception as exception1:
+            event.error = exception1
             print('Exception:{}'.format(exception1))
             print(traceback.format_exc())
             return exception1, None
+        finally:
+            self.metrics.record(event)
+
+    def _send_stream(self, method, values=None) -> Tuple[Any, Optional[JsonArrayStream]]:
+        """
+        Send a query to Bittrex and decode its result array incrementally while the response is read.
+
+        The query is recorded in metrics once the items start coming, with network time up to the first item.
+        When success only follows the result array, it is checked once the array is read, see _decode_stream.
+
+        :param method: which method to call
+        :param values: additional values depending on the method
+        :return: error(if any), JsonArrayStream of result dicts
+        """
+        event = QueryEvent(method=method)
+        try:
+            err, url, headers = self._prepare_query(method, values, event)
+            if err:
+                return err, None
+
+            sent = time.perf_counter()
+            stream = JsonArrayStream(self.transport.stream(url, headers, self.timeout))
+            header = stream.header()
+            event.network = time.perf_counter() - sent
+
+            if not header.get('success', stream.has_array):
+                event.error = header.get('message') or True
+                return event.error, None
+            return False, stream
+
+        except Exception as exception1:
+            event.error = exception1
+            print('Exception:{}'.format(exception1))
+            print(traceback.format_exc())
+            return exception1, None
+        finally:
+            self.metrics.record(event)
+
+    def _stream_history(self, method, values: dict, cls, time_field: str, start: Optional[datetime],
+                        end: Optional[datetime], chunk_size: Optional[int]) -> Tuple[Any, Iterator]:
+        """
+        Stream a history endpoint, filtered by time range.
+
+        Errors which only show while the response is read, e.g. a truncated body, a dropped connection or a
+        success=false after the result array, end the iterator early instead of raising from it, and are printed.
+
+        :return: error(if any), iterator of cls or of lists of cls
+        """
+        err, stream = self._send_stream(method, values)
+        if err:
+            return err, iter(())
+
+        records = self._decode_stream(stream, cls, time_field, start, end)
+        if chunk_size:
+            return err, self._chunked(records, chunk_size)
+        return err, records
+
+    def _decode_stream(self, stream: JsonArrayStream, cls, time_field: str, start: Optional[datetime],
+                       end: Optional[datetime]) -> Iterator:
+        try:
+            for item in stream:
+                if start is not None or end is not None:
+                    timestamp = parse_dt(item.get(time_field))
+                    if timestamp is None or (start is not None and timestamp < start) or \
+                            (end is not None and timestamp >= end):
+                        continue
+                yield self._decode(cls, item)
+        except Exception:
+            if stream.error is None:
+                raise
+        if stream.error is not None:
+            print('Error while streaming {}:{}'.format(cls.__name__, stream.error))
+
+    @staticmethod
+    def _chunked(records: Iterator, chunk_size: int) -> Iterator[list]:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _decode_list(self, cls, items: list) -> list:
+        """
+        Convert a list result to response objects, or to compact records when fast_decode is on
+
+        :param cls: Prodict response class
+        :param items: list of dicts
+        :return: List[cls] or List[record of cls]
+        """
+        if self.fast_decode:
+            return RECORD_TYPES[cls].from_dicts(items)
+        return [cls.from_dict(item) for item in items]
+
+    def _decode(self, cls, item: dict):
+        """
+        Convert a result to a response object, or to a compact record when fast_decode is on
+
+        :param cls: Prodict response class
+        :param item: dict
+        :return: cls or record of cls
+        """
+        if self.fast_decode:
+            return RECORD_TYPES[cls].from_dict(item)
+        return cls.from_dict(item)
 
     @classmethod
     def _parse_dt(cls, s: str) -> Optional[datetime]:
         """
-        Parse a Bittrex date string and convert to a python datetime object
+        Parse a Bittrex date string and convert to a python datetime object, keeping fractional seconds
         :param s: Datetime string
         :return: datetime
         """
-        if s is None:
-            return None
-        if "." in s:
-            s = s.split(".")[0]
-        return datetime.strptime(s, cls.DATETIME_PARSE_FORMAT)
+        return parse_dt(s)
 
     @classmethod
     def shared_instance(cls, apikey: str, secret: str, rate_limit: int = 5, account_name: str = 'NOT_PRIVODED',
-                        http_keep_alive: bool = True, understood=""):
+                        http_keep_alive: bool = True, understood="", rate_limiter: Optional[RateLimiter] = None,
+                        cache: Optional[QueryCache] = None, fast_decode: bool = False,
+                        transport: Optional[Transport] = None, metrics: Optional[QueryMetrics] = None,
+                        scheduler: Optional[RequestScheduler] = None, lazy: bool = False,
+                        market_info_path: Optional[str] = None, headless: bool = False):
         """
         Creates a shared instance.
 
@@ -410,8 +754,17 @@ class Bittrex:
         :param secret: API secret
         :param rate_limit: rate limit
         :param account_name: An account name if you work on multiple Bittrex account(for visibility only)
-        :param http_keep_alive: Keep HTTP connection open, speeds up requests
+        :param http_keep_alive: Open the pooled keep-alive connection on start, speeds up the first request
         :param understood: You must understand that this is a risky business
+        :param rate_limiter: RateLimiter to use instead of one built from rate_limit
+        :param cache: QueryCache to use instead of the shared one
+        :param fast_decode: return compact read-only records instead of Prodict objects
+        :param transport: Transport to send requests with, defaults to a pooled keep-alive RequestsTransport
+        :param metrics: QueryMetrics to record latency and payload metrics in
+        :param scheduler: RequestScheduler on rate_limiter, e.g. to drop stale public requests
+        :param lazy: load market_info on first access and skip the keep-alive warm-up, so construction does no I/O
+        :param market_info_path: JSON snapshot to load market_info from, written on the first download if missing
+        :param headless: no banners and no "understood" prompt, for workers without a terminal
         :return: BittrexAPI
         """
         local_params = locals()
@@ -437,7 +790,7 @@ class Bittrex:
         :param quote: str
         :return: str
         """
-        return f"{quote.upper()}-{coin.upper()}"
+        return to_market_name(coin, quote)
 
     @classmethod
     def _from_market(cls, market: str):
@@ -450,7 +803,7 @@ class Bittrex:
         :return: List[base_currency, quote_currency]
         """
         # basecoin, quote
-        return market.split("-")
+        return list(split_market_name(market))
 
     def _warm_up(self):
         # Warming up for Connection=keep-alive...
@@ -460,44 +813,73 @@ class Bittrex:
         else:
             self.warmed = True
 
-    def _calls_in_last_sec(self):
-        now = datetime.utcnow().timestamp()
-        calls_in_last_second = [call for call in self.calls if call >= (now - 1)]
-        self.calls = calls_in_last_second
-        return calls_in_last_second
-
-    def _wait_rate_limit(self):
-        """Wait for rate limit"""
-        now = datetime.utcnow().timestamp()
-        calls_in_last_sec2 = self._calls_in_last_sec()
-        if len(calls_in_last_sec2) >= self.rate_limit:
-            wait_time = (calls_in_last_sec2[0] - (now - 1))
-            print(self.calls)
-            print('Rate limit({} per second) reached! Waiting for {} second...'.format(self.rate_limit, wait_time))
-            if wait_time > 0:
-                time.sleep(wait_time)
-            else:
-                print('wait_time < 0')
-            # Wait finished
+    def _wait_rate_limit(self, group: str = 'public', method: str = '', market: Optional[str] = None) -> bool:
+        """
+        Wait for rate limit. Requests are let through by priority: trading, then account, then public data.
+
+        :param group: endpoint group, 'public', 'market' or 'account'
+        :param method: API method
+        :param market: market of the request, markets take turns within a priority
+        :return: False if the request waited past its deadline and must be dropped
+        """
+        return self.scheduler.acquire(method, group, market)
+
+    def scheduler_stats(self) -> SchedulerStats:
+        """
+        Granted and dropped requests per priority
+
+        :return: SchedulerStats
+        """
+        return self.scheduler.stats()
+
+    def transport_stats(self) -> TransportStats:
+        """
+        Request and connection reuse counts of the transport
+
+        :return: TransportStats
+        """
+        return self.transport.stats()
+
+    def cache_stats(self) -> CacheStats:
+        """
+        Hit/miss statistics of the query cache
+
+        :return: CacheStats
+        """
+        return self.cache.stats()
 
-    def get_candles(self, market_name: str, tick_interval: str) -> Tuple[Any, List[BittrexCandle]]:
+    def rate_limit_metrics(self) -> dict:
+        """
+        Rate limiter metrics per endpoint group
+
+        :return: dict of group -> RateLimiterMetrics
+        """
+        return self.rate_limiter.metrics()
+
+    def get_candles(self, market_name: str, tick_interval: str,
+                    as_arrays: bool = False) -> Tuple[Any, Union[List[BittrexCandle], CandleSeries]]:
         """
         Get candles
 
         :param market_name: BASE-QUOTE(BTC-USDT)
         :param tick_interval: TICK_INTERVAL_TYPES
-        :return: error(if any), List[BittrexCandle]
+        :param as_arrays: return a CandleSeries of float64 columns instead of a list of BittrexCandle
+        :return: error(if any), List[BittrexCandle] or CandleSeries
         """
-        if tick_interval not in list(BittrexTickIntervalTypes.all_types()):
-            return f'tick_interval should be one of {list(BittrexTickIntervalTypes.all_types())}', []
+        if tick_interval not in BittrexTickIntervalTypes.all_types().values():
+            error = f'tick_interval should be one of {list(BittrexTickIntervalTypes.all_types().values())}'
+            return error, CandleSeries(tick_interval=tick_interval) if as_arrays else []
 
         err, response = self._query('getticks', {'marketname': market_name, 'tickinterval': tick_interval})
+        if as_arrays:
+            if err:
+                return err, CandleSeries(tick_interval=tick_interval)
+            return err, CandleSeries.from_dicts(response.result, tick_interval)
 
-        candle_list: List[BittrexCandle] = []
-        for candle_dict in response.result:
-            candle_list.append(BittrexCandle.from_dict(candle_dict))
+        if err:
+            return err, []
 
-        return err, candle_list
+        return err, self._decode_list(BittrexCandle, response.result)
 
     def get_latest_candle(self, market_name, tick_interval) -> Tuple[Any, List[BittrexCandle]]:
         """
@@ -507,16 +889,14 @@ class Bittrex:
         :param tick_interval: TICK_INTERVAL_TYPES
         :return: error(if any), List[BittrexCandle]
         """
-        if tick_interval not in list(BittrexTickIntervalTypes.all_types()):
-            return f'tick_interval should be one of {list(BittrexTickIntervalTypes.all_types())}', []
+        if tick_interval not in BittrexTickIntervalTypes.all_types().values():
+            return f'tick_interval should be one of {list(BittrexTickIntervalTypes.all_types().values())}', []
 
         err, response = self._query('getlatesttick', {'marketname': market_name, 'tickinterval': tick_interval})
+        if err:
+            return err, []
 
-        candle_list: List[BittrexCandle] = []
-        for candle_dict in response.result:
-            candle_list.append(BittrexCandle.from_dict(candle_dict))
-
-        return err, candle_list
+        return err, self._decode_list(BittrexCandle, response.result)
 
     def get_markets(self) -> Tuple[Any, List[BittrexMarket]]:
         """
@@ -528,7 +908,7 @@ class Bittrex:
         if err:
             return err, []
 
-        return err, [BittrexMarket.from_dict(m) for m in response.result]
+        return err, self._decode_list(BittrexMarket, response.result)
 
     def get_markets_dict(self) -> Tuple[Any, dict]:
         """
@@ -551,7 +931,7 @@ class Bittrex:
         err, response = self._query('getcurrencies')
         if err:
             return err, []
-        return err, [BittrexCurrency.from_dict(m) for m in response.result]
+        return err, self._decode_list(BittrexCurrency, response.result)
 
     def get_ticker(self, market: str) -> Tuple[Any, Optional[BittrexTicker]]:
         """
@@ -563,29 +943,31 @@ class Bittrex:
         if err:
             return err, None
 
-        ticker: BittrexTicker = BittrexTicker.from_dict(dict(response.result))
+        ticker: BittrexTicker = self._decode(BittrexTicker, response.result)
 
         return err, ticker
 
-    def get_market_summaries(self) -> Tuple[Any, List[BittrexMarketSummary]]:
+    def get_market_summaries(self, max_age: Optional[float] = None) -> Tuple[Any, List[BittrexMarketSummary]]:
         """
         Get market summaries
 
+        :param max_age: staleness bound of a cached result in seconds, None for the cache ttl
         :return: error(if any), List[BittrexMarketSummary]
         """
-        err, response = self._query('getmarketsummaries')
+        err, response = self._query('getmarketsummaries', max_age=max_age)
         if err:
             return err, []
 
-        return err, [BittrexMarketSummary.from_dict(m) for m in response.result]
+        return err, self._decode_list(BittrexMarketSummary, response.result)
 
-    def get_market_summaries_dict(self):
+    def get_market_summaries_dict(self, max_age: Optional[float] = None):
         """
         Get market summaries as dict
 
+        :param max_age: staleness bound of a cached result in seconds, None for the cache ttl
         :return: error(if any), dict
         """
-        err, summaries = self.get_market_summaries()
+        err, summaries = self.get_market_summaries(max_age)
         if err:
             return err, summaries
 
@@ -597,38 +979,89 @@ class Bittrex:
 
         return err, sum_dict
 
-    def panic_sell_all_for_btc(self):
+    def snapshot(self, max_age: float = 1.0) -> Tuple[Any, dict]:
         """
-        Sells all in btc markets!
+        Get market summaries of all markets from a single getmarketsummaries call.
 
-        :return:
+        The last snapshot is reused as long as it is not older than `max_age` seconds.
+
+        :param max_age: staleness bound in seconds, 0 to always fetch
+        :return: error(if any), dict of MarketName -> BittrexMarketSummary
         """
-        err, balances_dict = self.get_balances_dict()
+        snapshot = self._summaries_snapshot
+        if snapshot is not None and time.monotonic() - snapshot[0] <= max_age:
+            return False, snapshot[1]
+
+        err, summaries = self.get_market_summaries_dict(max_age)
         if err:
-            return err, balances_dict
+            return err, {}
 
-        print('{} coins will be sold!'.format(len(balances_dict)))
+        self._summaries_snapshot = (time.monotonic(), summaries)
+        return err, summaries
 
-        input('Press ENTER to continue.')
+    def get_tickers(self, markets: Optional[List[str]] = None, max_age: float = 1.0) -> Tuple[Any, dict]:
+        """
+        Get tickers of many markets at the cost of one request.
 
-        for currency, balance_info in balances_dict.items():
-            if balance_info['Available'] == 0:
+        Markets which are not listed in the summaries are left out of the result.
+
+        :param markets: list of BASE-QUOTE(BTC-USDT), None for all markets
+        :param max_age: staleness bound of the summaries snapshot in seconds
+        :return: error(if any), dict of MarketName -> BittrexTicker
+        """
+        err, summaries = self.snapshot(max_age)
+        if err:
+            return err, {}
+
+        if markets is None:
+            markets = summaries.keys()
+
+        tickers = {}
+        for market in markets:
+            summary = summaries.get(market)
+            if summary is None:
                 continue
-            if currency == 'BTC':
+            if self.fast_decode:
+                tickers[market] = BittrexTickerRecord(summary.Bid, summary.Ask, summary.Last)
+            else:
+                tickers[market] = BittrexTicker(Bid=summary.Bid, Ask=summary.Ask, Last=summary.Last)
+
+        return err, tickers
+
+    def panic_sell_all_for_btc(self, confirm: bool = True, use_orderbook: bool = False) \
+            -> Tuple[Any, Optional[BulkExecution]]:
+        """
+        Sells all in btc markets at once!
+
+        :param confirm: ask for ENTER before selling
+        :param use_orderbook: price against order book depth instead of the top-of-book bid
+        :return: error(if any), BulkExecution
+        """
+        err, balances_dict = self.get_balances_dict()
+        if err:
+            return err, None
+
+        orders = []
+        for currency, balance_info in balances_dict.items():
+            if balance_info['Available'] == 0 or currency == 'BTC':
                 continue
-            print('Panic selling {}...'.format(currency))
             market_name = 'BTC-{}'.format(currency)
+            if self.market_info is not None and market_name not in self.market_info:
+                print('No BTC market for {}, skipping.'.format(currency))
+                continue
+            orders.append(BulkOrder.sell(market_name, balance_info['Available']))
 
-            # input('Will be selling {} of {}! Press enter to continue.'.format(balance_info['Available'], currency))
-            print('waiting for 1 second...')
-            time.sleep(1)
+        print('{} coins will be sold!'.format(len(orders)))
+        if confirm:
+            input('Press ENTER to continue.')
 
-            err, sell_order = self.sell_market(market_name, balance_info['Available'])
-            print('Panic sell order placed for {}'.format(currency))
-            if err:
-                print('Error on panic_sell_for_btc for {}'.format(currency))
-            else:
-                print('Panic sell order for {} is successful.'.format(currency))
+        err, execution = self.execute_orders(orders, use_orderbook=use_orderbook)
+        for result in execution.results:
+            if result.error:
+                print('Error on panic_sell_for_btc for {}:{}'.format(result.market, result.error))
+        print('Panic sold {} of {} coins in {:.3f} seconds.'.format(execution.succeeded, len(orders),
+                                                                    execution.total_time))
+        return err, execution
 
     def get_balances_dict(self) -> Tuple[Optional[Any], Optional[dict]]:
         err, balances = self.get_balances()
@@ -645,73 +1078,46 @@ class Bittrex:
 
         return err, balances_dict
 
-    def get_estimated_values(self):
-        err, balances_dict = self.get_balances_dict()
-        if err:
-            return err, balances_dict
-
-        err, market_summaries_dict = self.get_market_summaries_dict()
-        if err:
-            return err, market_summaries_dict
-
-        btc_market_summary = market_summaries_dict['USDT-BTC']
-        btc_price_in_usdt = btc_market_summary['Ask']
-
-        print('btc_price_in_usdt={} - btc_market_summary:{}'.format(btc_price_in_usdt, btc_market_summary))
-
-        btc_balance = 0
-        usdt_balance = 0
-        altcoins_total_btc_worth = 0
-
-        for currency, balance_info in balances_dict.items():
-            currency_balance = balance_info['Balance']
-            print('   {} Balance ={}'.format(currency, currency_balance))
-            if currency_balance == 0:
-                continue
-
-            if currency == 'BTC':
-                btc_balance = currency_balance
-                continue
-
-            if currency == 'USDT':
-                usdt_balance = currency_balance
-                continue
-
-            btc_market_name = 'BTC-{}'.format(currency)
-            market_summary_of_currency = market_summaries_dict.get(btc_market_name, None)
-
-            if market_summary_of_currency is None:
-                continue
-
-            print('   {} Summary={}'.format(btc_market_name, market_summary_of_currency))
-
-            altcoins_total_btc_worth += currency_balance * market_summary_of_currency['Ask']
-            print('   altcoins_total_btc_worth ={}'.format(altcoins_total_btc_worth))
+    def conversion_graph(self) -> Optional[ConversionGraph]:
+        """
+        Conversion paths of all currencies to BTC, rebuilt only when market_info changes
 
-        estimated_total_btc = altcoins_total_btc_worth + btc_balance
+        :return: ConversionGraph, None if market info is not loaded
+        """
+        if self.market_info is None:
+            return None
+        graph = self._conversion_graph
+        if graph is None or graph[0] is not self.market_info:
+            graph = self._conversion_graph = (self.market_info, ConversionGraph(self.market_info))
+        return graph[1]
 
-        altcoins_total_usdt_worth = altcoins_total_btc_worth * btc_price_in_usdt
+    def get_estimated_values(self, max_age: float = 1.0, price: str = 'Ask') -> Tuple[Any, Optional[Valuation]]:
+        """
+        Estimate the value of all balances in BTC and USDT.
 
-        estimated_total_usdt = estimated_total_btc * btc_price_in_usdt
+        Balances and market summaries are fetched at the same time, and summaries come from the snapshot if it is
+        not older than `max_age`. Coins without a BTC market are valued through ETH or USDT markets. When market info
+        could not be loaded, the conversion paths are taken from the names of the summarized markets instead.
 
-        altcoins_count = len(balances_dict)
+        :param max_age: staleness bound of the summaries snapshot in seconds
+        :param price: summary field to price with, 'Ask', 'Bid' or 'Last'
+        :return: error(if any), Valuation
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            summaries_future = executor.submit(self.snapshot, max_age)
+            err, balances_dict = self.get_balances_dict()
+            summaries_err, market_summaries_dict = summaries_future.result()
 
-        btc_worth_per_coin = altcoins_total_btc_worth / altcoins_count if altcoins_count > 0 else 0
+        if err:
+            return err, balances_dict
+        if summaries_err:
+            return summaries_err, market_summaries_dict
 
-        # usdt_percent = round(100 * usdt_balance / estimated_total_usdt, 3)
-        # btc_percent = round(100 * btc_balance / estimated_total_btc, 3)
-        # altcoins_percent = round(100 * altcoins_total_btc_worth / estimated_total_btc, 3)
+        graph = self.conversion_graph()
+        if graph is None:
+            graph = ConversionGraph.from_market_names(market_summaries_dict)
 
-        return False, {
-            'btc_balance': btc_balance,
-            'usdt_balance': usdt_balance,
-            'estimated_total_btc': estimated_total_btc,
-            'estimated_total_usdt': estimated_total_usdt,
-            'altcoins_total_btc_worth': altcoins_total_btc_worth,
-            'altcoins_total_usdt_worth': altcoins_total_usdt_worth,
-            'altcoins_count': altcoins_count,
-            'btc_worth_per_coin': btc_worth_per_coin
-        }
+        return False, graph.value(balances_dict, market_summaries_dict, price)
 
     def get_market_summary(self, market: str) -> Tuple[Any, List[BittrexMarketSummary]]:
         """
@@ -724,7 +1130,7 @@ class Bittrex:
         if err:
             return err, []
 
-        return err, [BittrexMarketSummary.from_dict(r) for r in response.result]
+        return err, self._decode_list(BittrexMarketSummary, response.result)
 
     def get_orderbook(self, market, order_type='both') -> Tuple[Any, Optional[BittrexOrderBook]]:
         """
@@ -738,7 +1144,35 @@ class Bittrex:
         if err:
             return err, None
 
-        return err, BittrexOrderBook.from_dict(orderbook.result)
+        return err, self._decode(BittrexOrderBook, orderbook.result)
+
+    def get_local_orderbook(self, market,
+                            book: Optional[LocalOrderBook] = None) -> Tuple[Any, Optional[LocalOrderBook]]:
+        """
+        Get order book as a LocalOrderBook for depth, VWAP and slippage queries
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param book: LocalOrderBook of the same market to update with only the changed levels
+        :return: error(if any), LocalOrderBook
+        """
+        err, orderbook = self.get_orderbook(market)
+        if err:
+            return err, None
+
+        if book is None:
+            return err, LocalOrderBook.from_orderbook(orderbook, market)
+
+        book.apply_snapshot(orderbook)
+        return err, book
+
+    def _depth_price(self, market, quantity, order_type) -> Tuple[Any, Optional[float]]:
+        err, book = self.get_local_orderbook(market)
+        if err:
+            return err, None
+        price = book.fill_price(quantity, order_type)
+        if price is None:
+            return f'Order book of {market} is not deep enough for {quantity:.8f}', None
+        return err, price
 
     def get_market_history(self, market) -> Tuple[Any, List[BittrexMarketHistory]]:
         """
@@ -751,7 +1185,21 @@ class Bittrex:
         if err:
             return err, []
 
-        return err, [BittrexMarketHistory.from_dict(mh) for mh in market_history_list]
+        return err, self._decode_list(BittrexMarketHistory, market_history_list.result)
+
+    def iter_market_history(self, market, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            chunk_size: Optional[int] = None) -> Tuple[Any, Iterator[BittrexMarketHistory]]:
+        """
+        Stream market history
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param start: only trades at or after this UTC time
+        :param end: only trades before this UTC time
+        :param chunk_size: yield lists of this many trades instead of single trades
+        :return: error(if any), iterator of BittrexMarketHistory
+        """
+        return self._stream_history('getmarkethistory', {'market': market}, BittrexMarketHistory, 'TimeStamp', start,
+                                    end, chunk_size)
 
     def buy_limit(self, market, quantity, buy_price) -> Tuple[Any, Optional[BittrexBuyLimit]]:
         """
@@ -762,20 +1210,31 @@ class Bittrex:
         :param buy_price: buy from this price
         :return: error(if any), BittrexBuyLimit
         """
+        error = self.validate_order(market, quantity, buy_price)
+        if error:
+            return error, None
         print(f'REAL LIMIT BUY=Market:{market} Quantity:{quantity:.8f} Rate:{buy_price:.8f}')
         err, response = self._query('buylimit', {'market': market, 'quantity': quantity, 'rate': buy_price})
         if err:
             return err, None
-        return err, BittrexBuyLimit.from_dict(response.result)
+        return err, self._decode(BittrexBuyLimit, response.result)
 
-    def buy_market(self, market, quantity) -> Tuple[Any, BittrexBuyLimit]:
+    def buy_market(self, market, quantity, use_orderbook: bool = False) -> Tuple[Any, BittrexBuyLimit]:
         """
         Buy from market price
 
         :param market: BASE-QUOTE(BTC-USDT)
         :param quantity: amount to buy
+        :param use_orderbook: price against order book depth instead of the top-of-book ask
         :return: error(if any), BittrexBuyLimit
         """
+        if use_orderbook:
+            err, price = self._depth_price(market, quantity, BittrexOrderType.BUY)
+            if err:
+                print('Error on getting depth price:{}'.format(err))
+                return err, BittrexBuyLimit()
+            return self.buy_limit(market, quantity, price)
+
         err, ticker = self.get_ticker(market)
         if err:
             print('Error on getting ask price:{}'.format(err))
@@ -792,20 +1251,31 @@ class Bittrex:
         :param sell_price: sell from this price
         :return: error(if any), BittrexSellLimit
         """
+        error = self.validate_order(market, quantity, sell_price)
+        if error:
+            return error, None
         print(f'REAL LIMIT SELL=Market:{market} Quantity:{quantity:.8f} Rate:{sell_price:.8f}')
         err, response = self._query('selllimit', {'market': market, 'quantity': quantity, 'rate': sell_price})
         if err:
             return err, None
-        return err, BittrexSellLimit.from_dict(response.result)
+        return err, self._decode(BittrexSellLimit, response.result)
 
-    def sell_market(self, market, quantity) -> Tuple[Any, Optional[BittrexSellLimit]]:
+    def sell_market(self, market, quantity, use_orderbook: bool = False) -> Tuple[Any, Optional[BittrexSellLimit]]:
         """
         Sell from market price.
 
         :param market: BASE-QUOTE(BTC-USDT)
         :param quantity: amount to sell
+        :param use_orderbook: price against order book depth instead of the top-of-book bid
         :return: error(if any), BittrexSellLimit
         """
+        if use_orderbook:
+            err, price = self._depth_price(market, quantity, BittrexOrderType.SELL)
+            if err:
+                print(f'sell_market:Error on getting depth price:{err}')
+                return err, None
+            return self.sell_limit(market, quantity, price)
+
         err, ticker = self.get_ticker(market)
         if err:
             print(f'sell_market:Error on getting bid price:{err}')
@@ -813,6 +1283,77 @@ class Bittrex:
         print(f'sell_market:Bid price ={ticker.Bid:.8f}')
         return self.sell_limit(market, quantity, ticker.Bid)
 
+    def execute_orders(self, orders: List[BulkOrder], use_orderbook: bool = False, max_age: float = 1.0,
+                       max_workers: int = 16) -> Tuple[Any, BulkExecution]:
+        """
+        Place many limit orders concurrently.
+
+        Orders without a rate are priced from one market summaries snapshot, at the ask for buys and at the bid for
+        sells, or against the depth of their order books. Orders are then sent at once and go out as fast as the
+        rate limiter allows, ahead of any public requests.
+
+        :param orders: list of BulkOrder
+        :param use_orderbook: price against order book depth instead of the top of the book
+        :param max_age: staleness bound of the summaries snapshot in seconds
+        :param max_workers: orders in flight at the same time
+        :return: error(if any order failed), BulkExecution with a BulkOrderResult per order, in the same order
+        """
+        started = time.perf_counter()
+        results = [BulkOrderResult(market=order.market, order_type=order.order_type, quantity=order.quantity,
+                                   rate=order.rate, error=False, result=None, elapsed=0.0) for order in orders]
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(orders)))) as executor:
+            self._price_orders([result for result in results if not result.rate], use_orderbook, max_age, executor)
+            for _ in executor.map(self._place_order, [result for result in results if not result.error]):
+                pass
+
+        failed = sum(1 for result in results if result.error)
+        execution = BulkExecution(results=results,
+                                  succeeded=len(results) - failed,
+                                  failed=failed,
+                                  total_time=time.perf_counter() - started)
+        err = f'{failed} of {len(results)} orders failed' if failed else False
+        return err, execution
+
+    def _price_orders(self, results: List[BulkOrderResult], use_orderbook: bool, max_age: float, executor):
+        if not results:
+            return
+
+        if use_orderbook:
+            markets = list({result.market for result in results})
+            books = dict(zip(markets, executor.map(self.get_local_orderbook, markets)))
+            for result in results:
+                err, book = books[result.market]
+                if err:
+                    result.error = err
+                    continue
+                rate = book.fill_price(result.quantity, result.order_type)
+                if rate is None:
+                    result.error = f'Order book of {result.market} is not deep enough for {result.quantity:.8f}'
+                else:
+                    result.rate = rate
+            return
+
+        err, summaries = self.snapshot(max_age)
+        for result in results:
+            summary = summaries.get(result.market)
+            if err:
+                result.error = err
+            elif summary is None:
+                result.error = f'No market summary for {result.market}'
+            else:
+                result.rate = summary.Ask if result.order_type == BittrexOrderType.BUY else summary.Bid
+
+    def _place_order(self, result: BulkOrderResult):
+        started = time.perf_counter()
+        if result.order_type == BittrexOrderType.BUY:
+            err, order = self.buy_limit(result.market, result.quantity, result.rate)
+        else:
+            err, order = self.sell_limit(result.market, result.quantity, result.rate)
+        result.error = err
+        result.result = order
+        result.elapsed = time.perf_counter() - started
+
     def cancel(self, order_uuid) -> Tuple[Any, bool]:
         """
         Cancel an order by uuid
@@ -840,7 +1381,7 @@ class Bittrex:
 
         if err:
             return err, []
-        return err, [BittrexOpenOrder.from_dict(oo) for oo in response.result]
+        return err, self._decode_list(BittrexOpenOrder, response.result)
 
     def get_balances(self) -> Tuple[Any, List[BittrexBalance]]:
         """
@@ -851,7 +1392,7 @@ class Bittrex:
         err, response = self._query('getbalances')
         if err:
             return err, []
-        return err, [BittrexBalance.from_dict(b) for b in response.result]
+        return err, self._decode_list(BittrexBalance, response.result)
 
     def get_balance(self, currency) -> Tuple[Any, Optional[BittrexBalance]]:
         """
@@ -863,7 +1404,7 @@ class Bittrex:
         err, response = self._query('getbalance', {'currency': currency})
         if err:
             return err, None
-        return err, BittrexBalance.from_dict(response.result)
+        return err, self._decode(BittrexBalance, response.result)
 
     def get_deposit_address(self, currency) -> Tuple[Any, Optional[BittrexDepositAddress]]:
         """
@@ -876,7 +1417,7 @@ class Bittrex:
         err, response = self._query('getdepositaddress', {'currency': currency})
         if err:
             return err, None
-        return err, BittrexDepositAddress.from_dict(response.result)
+        return err, self._decode(BittrexDepositAddress, response.result)
 
     def withdraw(self, currency, quantity, address, paymentid=None) -> Tuple[Any, Optional[BittrexWithdraw]]:
         """
@@ -895,7 +1436,7 @@ class Bittrex:
         err, response = self._query('withdraw', params)
         if err:
             return err, None
-        return err, BittrexWithdraw.from_dict(response.result)
+        return err, self._decode(BittrexWithdraw, response.result)
 
     def get_order(self, order_uuid) -> Tuple[Any, Optional[BittrexOrder]]:
         """
@@ -907,7 +1448,7 @@ class Bittrex:
         err, response = self._query('getorder', {'uuid': order_uuid})
         if err:
             return err, None
-        return err, BittrexOrder.from_dict(response.result)
+        return err, self._decode(BittrexOrder, response.result)
 
     def get_order_history(self, market=None) -> Tuple[Any, List[BittrexOrderHistory]]:
         """
@@ -923,7 +1464,7 @@ class Bittrex:
 
         if err:
             return err, []
-        return err, [BittrexOrderHistory.from_dict(e) for e in response.result]
+        return err, self._decode_list(BittrexOrderHistory, response.result)
 
         # original code
         # return self.query('getorderhistory', {'market': market, 'count': count})
@@ -942,7 +1483,7 @@ class Bittrex:
 
         if err:
             return err, []
-        return err, [BittrexWithdrawalDepositHistory.from_dict(e) for e in response.result]
+        return err, self._decode_list(BittrexWithdrawalDepositHistory, response.result)
 
     def get_deposit_history(self, currency) -> Tuple[Any, List[BittrexWithdrawalDepositHistory]]:
         """
@@ -958,4 +1499,50 @@ class Bittrex:
 
         if err:
             return err, []
-        return err, [BittrexWithdrawalDepositHistory.from_dict(e) for e in response.result]
+        return err, self._decode_list(BittrexWithdrawalDepositHistory, response.result)
+
+    def iter_order_history(self, market=None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                           chunk_size: Optional[int] = None) -> Tuple[Any, Iterator[BittrexOrderHistory]]:
+        """
+        Stream order history. Orders are decoded one by one while the response is read, instead of all at once.
+
+        :param market: BASE-QUOTE(BTC-USDT), None for all markets
+        :param start: only orders at or after this UTC time
+        :param end: only orders before this UTC time
+        :param chunk_size: yield lists of this many orders instead of single orders
+        :return: error(if any), iterator of BittrexOrderHistory
+        """
+        values = {'market': market} if market else None
+        return self._stream_history('getorderhistory', values, BittrexOrderHistory, 'TimeStamp', start, end,
+                                    chunk_size)
+
+    def iter_withdrawal_history(self, currency=None, start: Optional[datetime] = None,
+                                end: Optional[datetime] = None, chunk_size: Optional[int] = None) \
+            -> Tuple[Any, Iterator[BittrexWithdrawalDepositHistory]]:
+        """
+        Stream withdrawal history
+
+        :param currency: a string literal for the currency (ie. BTC), None for all currencies
+        :param start: only withdrawals opened at or after this UTC time
+        :param end: only withdrawals opened before this UTC time
+        :param chunk_size: yield lists of this many withdrawals instead of single withdrawals
+        :return: error(if any), iterator of BittrexWithdrawalDepositHistory
+        """
+        values = {'currency': currency} if currency else None
+        return self._stream_history('getwithdrawalhistory', values, BittrexWithdrawalDepositHistory, 'Opened', start,
+                                    end, chunk_size)
+
+    def iter_deposit_history(self, currency=None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             chunk_size: Optional[int] = None) -> Tuple[Any, Iterator[BittrexWithdrawalDepositHistory]]:
+        """
+        Stream deposit history
+
+        :param currency: a string literal for the currency (ie. BTC), None for all currencies
+        :param start: only deposits opened at or after this UTC time
+        :param end: only deposits opened before this UTC time
+        :param chunk_size: yield lists of this many deposits instead of single deposits
+        :return: error(if any), iterator of BittrexWithdrawalDepositHistory
+        """
+        values = {'currency': currency} if currency else None
+        return self._stream_history('getdeposithistory', values, BittrexWithdrawalDepositHistory, 'Opened', start,
+                                    end, chunk_size)
@@ -0,0 +1,47 @@
+from typing import Any, List
+
+from prodict import Prodict
+
+
+class BulkOrder(Prodict):
+    market: str
+    order_type: str
+    quantity: float
+    rate: float
+
+    @classmethod
+    def buy(cls, market: str, quantity: float, rate: float = None):
+        """
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param quantity: amount to buy
+        :param rate: limit rate, None to price from market data
+        :return: BulkOrder
+        """
+        return cls(market=market, order_type='BUY', quantity=quantity, rate=rate)
+
+    @classmethod
+    def sell(cls, market: str, quantity: float, rate: float = None):
+        """
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param quantity: amount to sell
+        :param rate: limit rate, None to price from market data
+        :return: BulkOrder
+        """
+        return cls(market=market, order_type='SELL', quantity=quantity, rate=rate)
+
+
+class BulkOrderResult(Prodict):
+    market: str
+    order_type: str
+    quantity: float
+    rate: float
+    error: Any
+    result: Any
+    elapsed: float
+
+
+class BulkExecution(Prodict):
+    results: List[BulkOrderResult]
+    succeeded: int
+    failed: int
+    total_time: float
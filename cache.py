@@ -0,0 +1,166 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from prodict import Prodict
+
+
+class CacheStats(Prodict):
+    hits: int
+    misses: int
+    stale_hits: int
+    coalesced: int
+    refreshes: int
+    evictions: int
+    size: int
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Tuple[Any, Any] = (None, None)
+
+
+class QueryCache:
+    """
+    TTL cache for API queries with LRU eviction, stale-while-revalidate and request coalescing.
+
+    Only methods listed in `ttls` are cached. A method with ttl 0 is never stored, but concurrent callers still share
+    one in-flight request. Entries older than their ttl but within the method's stale window are returned at once
+    while a background thread refreshes them. Only successful results are stored.
+    """
+    DEFAULT_TTLS = {'getmarkets': 3600, 'getcurrencies': 3600, 'getmarketsummaries': 1}
+    DEFAULT_STALE_TTLS = {'getmarkets': 86400, 'getcurrencies': 86400}
+
+    __shared_cache = None
+    __transport_caches = weakref.WeakKeyDictionary()
+    __shared_lock = threading.Lock()
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, stale_ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 256):
+        """
+        :param ttls: method -> seconds a result is fresh
+        :param stale_ttls: method -> seconds a result may be served stale after it expired
+        :param max_entries: least recently used entries are evicted above this size
+        """
+        self.ttls = dict(self.DEFAULT_TTLS if ttls is None else ttls)
+        self.stale_ttls = dict(self.DEFAULT_STALE_TTLS if stale_ttls is None else stale_ttls)
+        self.max_entries = max_entries
+
+        self._entries: Dict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._stats = CacheStats(hits=0, misses=0, stale_hits=0, coalesced=0, refreshes=0, evictions=0, size=0)
+
+    @classmethod
+    def shared(cls, transport=None):
+        """
+        Cache shared by all instances which were not given one and send their queries through the same transport.
+        Cached methods are public, so instances reaching the same exchange can share results. Instances with their
+        own transport, e.g. a CallbackTransport serving fake responses, never see results of other transports.
+
+        :param transport: Transport of the instance, None for the default HTTP transport
+        :return: QueryCache
+        """
+        with cls.__shared_lock:
+            if transport is not None:
+                cache = cls.__transport_caches.get(transport)
+                if cache is None:
+                    cache = cls.__transport_caches[transport] = cls()
+                return cache
+            if cls.__shared_cache is None:
+                cls.__shared_cache = cls()
+            return cls.__shared_cache
+
+    def caches(self, method: str) -> bool:
+        return method in self.ttls
+
+    def get(self, key: Hashable, method: str, fetch: Callable[[], Tuple[Any, Any]],
+            max_age: Optional[float] = None) -> Tuple[Any, Any]:
+        """
+        Get a cached result or fetch it.
+
+        :param key: cache key, a tuple starting with the method name
+        :param method: API method, selects the ttl
+        :param fetch: function returning error(if any), result
+        :param max_age: caller's staleness bound in seconds, a cached result older than this is never returned
+        :return: error(if any), result
+        """
+        ttl = self.ttls.get(method, 0)
+        stale_ttl = self.stale_ttls.get(method, 0)
+        fresh_ttl = ttl
+        if max_age is not None:
+            fresh_ttl = min(ttl, max_age)
+            stale_ttl = 0
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= fresh_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return False, entry[1]
+                if stale_ttl and age <= ttl + stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats.stale_hits += 1
+                    if key not in self._inflight:
+                        self._inflight[key] = _InFlight()
+                        self._stats.refreshes += 1
+                        threading.Thread(target=self._fetch, args=(key, ttl, fetch), daemon=True).start()
+                    return False, entry[1]
+
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = _InFlight()
+                self._stats.misses += 1
+            else:
+                self._stats.coalesced += 1
+
+        if not leader:
+            inflight.done.wait()
+            return inflight.result
+
+        return self._fetch(key, ttl, fetch)
+
+    def _fetch(self, key: Hashable, ttl: float, fetch: Callable[[], Tuple[Any, Any]]) -> Tuple[Any, Any]:
+        try:
+            result = fetch()
+        except Exception as exception1:
+            result = (exception1, None)
+
+        with self._lock:
+            err, value = result
+            if not err and ttl > 0:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats.evictions += 1
+            inflight = self._inflight.pop(key)
+
+        inflight.result = result
+        inflight.done.set()
+        return result
+
+    def invalidate(self, method: Optional[str] = None):
+        """
+        Drop cached entries.
+
+        :param method: drop only entries of this method, None for all
+        """
+        with self._lock:
+            if method is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == method]:
+                del self._entries[key]
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            stats = CacheStats.from_dict(self._stats)
+            stats.size = len(self._entries)
+            return stats
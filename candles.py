@@ -0,0 +1,151 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Union
+
+from timeparse import to_epoch_column
+
+COLUMNS = ('O', 'H', 'L', 'C', 'V', 'BV')
+
+INTERVAL_SECONDS = {
+    'onemin': 60,
+    'fivemin': 5 * 60,
+    'thirtymin': 30 * 60,
+    'hour': 60 * 60,
+    'day': 24 * 60 * 60,
+}
+
+
+def _column(values) -> memoryview:
+    if isinstance(values, memoryview):
+        return values
+    if not isinstance(values, array):
+        values = array('d', values)
+    return memoryview(values)
+
+
+class CandleSeries:
+    """
+    Candles stored column by column in contiguous float64 buffers.
+
+    Columns are O, H, L, C, V, BV and T, where T is the open time in UTC epoch seconds. Every column is a
+    `memoryview` of doubles, so slicing and `to_numpy()` do not copy.
+    """
+
+    def __init__(self, T=(), O=(), H=(), L=(), C=(), V=(), BV=(), tick_interval: Optional[str] = None):
+        self.tick_interval = tick_interval
+        self.T = _column(T)
+        self.O = _column(O)
+        self.H = _column(H)
+        self.L = _column(L)
+        self.C = _column(C)
+        self.V = _column(V)
+        self.BV = _column(BV)
+
+    @classmethod
+    def from_dicts(cls, candles: Iterable[dict], tick_interval: Optional[str] = None) -> 'CandleSeries':
+        """
+        Parse candles straight into columns
+
+        :param candles: getticks result, dicts with O, H, L, C, V, BV and T keys
+        :param tick_interval: BittrexTickIntervalTypes
+        :return: CandleSeries
+        """
+        candles = list(candles)
+        columns = {name: array('d') for name in COLUMNS}
+        O, H, L, C, V, BV = (columns[name] for name in COLUMNS)
+        columns['T'] = to_epoch_column([candle['T'] for candle in candles])
+        for candle in candles:
+            O.append(candle['O'])
+            H.append(candle['H'])
+            L.append(candle['L'])
+            C.append(candle['C'])
+            V.append(candle['V'])
+            BV.append(candle['BV'])
+        return cls(tick_interval=tick_interval, **columns)
+
+    def columns(self) -> Dict[str, memoryview]:
+        return dict(T=self.T, O=self.O, H=self.H, L=self.L, C=self.C, V=self.V, BV=self.BV)
+
+    def __len__(self):
+        return len(self.T)
+
+    def __getitem__(self, item: Union[int, slice]):
+        if isinstance(item, slice):
+            return CandleSeries(tick_interval=self.tick_interval,
+                                **{name: column[item] for name, column in self.columns().items()})
+        return {name: column[item] for name, column in self.columns().items()}
+
+    def __repr__(self):
+        return f'CandleSeries(tick_interval={self.tick_interval!r}, len={len(self)})'
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> 'CandleSeries':
+        """
+        Candles opened in [start, end)
+
+        :param start: UTC epoch seconds, None for the beginning
+        :param end: UTC epoch seconds, None for the end
+        :return: CandleSeries sharing this series' buffers
+        """
+        first = 0 if start is None else bisect_left(self.T, start)
+        last = len(self) if end is None else bisect_left(self.T, end)
+        return self[first:last]
+
+    def resample(self, tick_interval: str) -> 'CandleSeries':
+        """
+        Aggregate into a coarser BittrexTickIntervalTypes interval
+
+        :param tick_interval: BittrexTickIntervalTypes
+        :return: CandleSeries
+        """
+        seconds = INTERVAL_SECONDS[tick_interval]
+        if self.tick_interval is not None and seconds < INTERVAL_SECONDS[self.tick_interval]:
+            raise ValueError(f'Cannot resample {self.tick_interval} candles to {tick_interval}')
+
+        T, O, H, L, C, V, BV = (array('d') for _ in range(7))
+        bucket = None
+        for i in range(len(self)):
+            start = self.T[i] - self.T[i] % seconds
+            if start != bucket:
+                bucket = start
+                T.append(start)
+                O.append(self.O[i])
+                H.append(self.H[i])
+                L.append(self.L[i])
+                C.append(self.C[i])
+                V.append(self.V[i])
+                BV.append(self.BV[i])
+                continue
+            if self.H[i] > H[-1]:
+                H[-1] = self.H[i]
+            if self.L[i] < L[-1]:
+                L[-1] = self.L[i]
+            C[-1] = self.C[i]
+            V[-1] += self.V[i]
+            BV[-1] += self.BV[i]
+
+        return CandleSeries(T, O, H, L, C, V, BV, tick_interval=tick_interval)
+
+    def to_numpy(self) -> dict:
+        """
+        Columns as NumPy arrays. Price and volume columns share memory with this series, T is converted to
+        datetime64[s]. Requires numpy.
+
+        :return: dict of column name -> numpy.ndarray
+        """
+        import numpy
+
+        arrays = {name: numpy.frombuffer(getattr(self, name), dtype=numpy.float64) for name in COLUMNS}
+        arrays['T'] = numpy.frombuffer(self.T, dtype=numpy.float64).astype(numpy.int64).astype('datetime64[s]')
+        return arrays
+
+    def to_pandas(self):
+        """
+        Candles as a pandas DataFrame indexed by T. Requires pandas.
+
+        :return: pandas.DataFrame
+        """
+        import pandas
+
+        arrays = self.to_numpy()
+        index = pandas.DatetimeIndex(arrays.pop('T'), name='T')
+        return pandas.DataFrame(arrays, index=index, copy=False)
@@ -0,0 +1,142 @@
+import mmap
+import os
+import time
+from array import array
+from bisect import bisect_right
+from typing import Any, List, Optional, Tuple
+
+from candles import CandleSeries, COLUMNS, INTERVAL_SECONDS
+
+ALL_COLUMNS = ('T',) + COLUMNS
+# T is written last, so a row is only complete once its T is stored
+WRITE_ORDER = COLUMNS + ('T',)
+ITEM_SIZE = array('d').itemsize
+
+
+class CandleStore:
+    """
+    On-disk candle cache keyed by (market, tick interval).
+
+    Every column of a series is an append-only file of native float64 values in `<root>/<market>/<interval>/`.
+    Reading memory-maps the files, so a stored series is available without any HTTP or JSON parsing. The number of
+    rows is the length of the shortest column, and T is written last, so a series interrupted while appending is
+    cut back to its complete rows on the next read.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _dir(self, market: str, tick_interval: str) -> str:
+        return os.path.join(self.root, market, tick_interval)
+
+    def _path(self, market: str, tick_interval: str, column: str) -> str:
+        return os.path.join(self._dir(market, tick_interval), column + '.f64')
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """
+        :return: List[(market, tick_interval)] of stored series
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return [(market, tick_interval)
+                for market in sorted(os.listdir(self.root))
+                for tick_interval in sorted(os.listdir(os.path.join(self.root, market)))]
+
+    def _rows(self, market: str, tick_interval: str) -> int:
+        sizes = []
+        for column in ALL_COLUMNS:
+            path = self._path(market, tick_interval, column)
+            sizes.append(os.path.getsize(path) // ITEM_SIZE if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def read(self, market: str, tick_interval: str) -> CandleSeries:
+        """
+        Memory-map a stored series
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param tick_interval: BittrexTickIntervalTypes
+        :return: CandleSeries backed by read-only maps of the column files, empty if nothing is stored
+        """
+        rows = self._rows(market, tick_interval)
+        if rows == 0:
+            return CandleSeries(tick_interval=tick_interval)
+
+        columns = {}
+        for column in ALL_COLUMNS:
+            with open(self._path(market, tick_interval, column), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            columns[column] = memoryview(mapped).cast('d')[:rows]
+        return CandleSeries(tick_interval=tick_interval, **columns)
+
+    def append(self, market: str, tick_interval: str, series: CandleSeries) -> int:
+        """
+        Append candles newer than the stored ones. A candle with the same T as the last stored one replaces it.
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param tick_interval: BittrexTickIntervalTypes
+        :param series: candles sorted by T
+        :return: number of rows appended
+        """
+        os.makedirs(self._dir(market, tick_interval), exist_ok=True)
+        rows = self._rows(market, tick_interval)
+        last_t = None
+        if rows:
+            last_t = self.read(market, tick_interval).T[-1]
+
+        first = 0
+        if last_t is not None:
+            while first < len(series) and series.T[first] < last_t:
+                first += 1
+            if first < len(series) and series.T[first] == last_t:
+                self._replace_row(market, tick_interval, rows - 1, series[first])
+                first += 1
+
+        new_rows = series[first:]
+        for column in WRITE_ORDER:
+            path = self._path(market, tick_interval, column)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                f.truncate(rows * ITEM_SIZE)
+                f.seek(rows * ITEM_SIZE)
+                f.write(getattr(new_rows, column))
+        return len(new_rows)
+
+    def _replace_row(self, market: str, tick_interval: str, row: int, values: dict):
+        for column in WRITE_ORDER:
+            with open(self._path(market, tick_interval, column), 'r+b') as f:
+                f.seek(row * ITEM_SIZE)
+                f.write(array('d', [values[column]]).tobytes())
+
+    def sync(self, client, market: str, tick_interval: str, now: Optional[float] = None) -> Tuple[Any, int]:
+        """
+        Bring a stored series up to date with the candles which closed.
+
+        Only closed candles are stored: the latest candle keeps changing until its interval ends, and a stored row is
+        never downloaded again. Full history is downloaded when nothing is stored yet or when the latest candle
+        leaves a gap after the stored ones. Otherwise only the latest candle is fetched, and appended once closed.
+
+        :param client: Bittrex instance
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param tick_interval: BittrexTickIntervalTypes
+        :param now: UTC epoch seconds candles must have closed by, None for the current time
+        :return: error(if any), number of rows appended
+        """
+        seconds = INTERVAL_SECONDS[tick_interval]
+        last_open = (time.time() if now is None else now) - seconds
+
+        def closed(series: CandleSeries) -> CandleSeries:
+            return series[:bisect_right(series.T, last_open)]
+
+        rows = self._rows(market, tick_interval)
+        if rows:
+            last_t = self.read(market, tick_interval).T[-1]
+            err, latest = client.get_latest_candle(market, tick_interval)
+            if err:
+                return err, 0
+            latest_series = CandleSeries.from_dicts(latest, tick_interval)
+            if len(latest_series) and latest_series.T[0] <= last_t + seconds:
+                return err, self.append(market, tick_interval, closed(latest_series))
+
+        err, series = client.get_candles(market, tick_interval, as_arrays=True)
+        if err:
+            return err, 0
+        return err, self.append(market, tick_interval, closed(series))
@@ -0,0 +1,166 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Optional
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_COMPACT_AT = 65536
+
+
+class JsonArrayStream:
+    """
+    Incremental decoder for a JSON object with one big array member, like a Bittrex response
+    `{"success":true,"message":"","result":[...]}`.
+
+    Chunks are read only as far as needed: `header()` decodes the members before the array, and iterating yields
+    the array items one by one, so the whole response is never held in memory. Array items must be objects.
+    Members may come in any order: those after the array are decoded into the header once the array is read.
+
+    A response which breaks off or is not valid JSON raises from the iterator, e.g. `json.JSONDecodeError`, and the
+    exception is kept in `error`. A `"success":false` after the array ends the iteration and sets `error` to the
+    message.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str = 'result'):
+        """
+        :param chunks: response body in pieces, e.g. from Transport.stream
+        :param key: member holding the array
+        """
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._key = key
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._header: Optional[dict] = None
+        self._array = False
+        self.size = 0
+        self.error: Any = None
+
+    def _read(self) -> bool:
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.size += len(chunk)
+            if self._pos > _COMPACT_AT:
+                self._buffer = self._buffer[self._pos:]
+                self._pos = 0
+            self._buffer += self._utf8.decode(chunk)
+            return True
+        self._buffer += self._utf8.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _skip(self, characters: str = _WHITESPACE):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in characters:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._read():
+                return
+
+    def _next(self) -> str:
+        """Skip whitespace and return the next character, empty at the end of the response"""
+        self._skip()
+        return self._buffer[self._pos:self._pos + 1]
+
+    def _expect(self, character: str):
+        if self._next() != character:
+            raise json.JSONDecodeError(f'Expecting {character!r}', self._buffer, self._pos)
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """Decode the value at the position, reading chunks until it is complete"""
+        self._skip()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            # a number at the end of the buffer may go on in the next chunk
+            if end == len(self._buffer) and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def _members(self, members: dict) -> bool:
+        """
+        Decode members up to the end of the object, or up to the array member, which is then entered
+
+        :param members: dict to decode the members into
+        :return: True if the array was entered
+        """
+        while True:
+            character = self._next()
+            if character == ',':
+                self._pos += 1
+                character = self._next()
+            if character == '}':
+                self._pos += 1
+                return False
+            if character != '"':
+                raise json.JSONDecodeError('Expecting property name', self._buffer, self._pos)
+            name = self._value()
+            self._expect(':')
+            if name == self._key and not self._array and self._next() == '[':
+                self._pos += 1
+                return True
+            members[name] = self._value()
+
+    def header(self) -> dict:
+        """
+        Members of the object which come before the array. If the array member is missing or not an array, e.g.
+        `"result":null` on errors, all members are decoded and returned instead.
+
+        :return: dict
+        """
+        if self._header is not None:
+            return self._header
+
+        header = {}
+        self._expect('{')
+        self._array = self._members(header)
+        self._header = header
+        return header
+
+    @property
+    def has_array(self) -> bool:
+        """True if the header was followed by the array member"""
+        self.header()
+        return self._array
+
+    def __iter__(self) -> Iterator:
+        try:
+            if not self.has_array:
+                return
+            while True:
+                self._skip(_WHITESPACE + ',')
+                if self._buffer[self._pos:self._pos + 1] == ']':
+                    self._pos += 1
+                    break
+                while True:
+                    try:
+                        item, self._pos = _decoder.raw_decode(self._buffer, self._pos)
+                        break
+                    except json.JSONDecodeError:
+                        if not self._read():
+                            raise
+                yield item
+            self._members(self._header)
+            if self._header.get('success') is False:
+                self.error = self._header.get('message') or True
+        except Exception as exception1:
+            self.error = exception1
+            raise
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop reading, e.g. to release the connection when the rest of the array is not needed"""
+        self._eof = True
+        close = getattr(self._chunks, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,122 @@
+import sys
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+_EMPTY: Tuple[str, ...] = ()
+
+
+@lru_cache(maxsize=4096)
+def to_market_name(currency: str, base_currency: str) -> str:
+    """
+    Interned market name of a currency pair, e.g. LTC, BTC -> BTC-LTC
+
+    :param currency: market currency
+    :param base_currency: base currency
+    :return: str
+    """
+    return sys.intern(f"{base_currency.upper()}-{currency.upper()}")
+
+
+@lru_cache(maxsize=4096)
+def split_market_name(market: str) -> Tuple[str, str]:
+    """
+    Split a market name, e.g. BTC-LTC -> (BTC, LTC)
+
+    :param market: BASE-QUOTE(BTC-USDT)
+    :return: (base currency, market currency)
+    """
+    base_currency, _, currency = market.partition('-')
+    return sys.intern(base_currency), sys.intern(currency)
+
+
+class MarketIndex:
+    """
+    Lookup tables over market info, built once, so that checks on the order path are dict and set lookups.
+
+    Market names are interned, so names coming out of the index compare and hash quickly.
+    """
+
+    def __init__(self, market_info: dict):
+        """
+        :param market_info: dict of MarketName -> BittrexMarket, e.g. Bittrex.market_info
+        """
+        self.markets = {}
+        self.min_trade_size: Dict[str, float] = {}
+        by_base: Dict[str, list] = {}
+        by_currency: Dict[str, list] = {}
+        pairs: Dict[Tuple[str, str], str] = {}
+        active = set()
+
+        for market in market_info.values():
+            name = sys.intern(market.MarketName)
+            self.markets[name] = market
+            self.min_trade_size[name] = market.MinTradeSize or 0.0
+            by_base.setdefault(market.BaseCurrency, []).append(name)
+            by_currency.setdefault(market.MarketCurrency, []).append(name)
+            pairs[(market.MarketCurrency, market.BaseCurrency)] = name
+            if market.IsActive is not False:
+                active.add(name)
+
+        self.by_base: Dict[str, Tuple[str, ...]] = {base: tuple(names) for base, names in by_base.items()}
+        self.by_currency: Dict[str, Tuple[str, ...]] = {currency: tuple(names)
+                                                       for currency, names in by_currency.items()}
+        self.active: FrozenSet[str] = frozenset(active)
+        self._pairs = pairs
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def __contains__(self, market: str) -> bool:
+        return market in self.markets
+
+    def get(self, market: str):
+        """
+        :param market: BASE-QUOTE(BTC-USDT)
+        :return: BittrexMarket, None if there is no such market
+        """
+        return self.markets.get(market)
+
+    def name(self, currency: str, base_currency: str) -> Optional[str]:
+        """
+        :param currency: market currency, e.g. LTC
+        :param base_currency: base currency, e.g. BTC
+        :return: market name, None if there is no such market
+        """
+        return self._pairs.get((currency, base_currency))
+
+    def markets_of_base(self, base_currency: str) -> Tuple[str, ...]:
+        """
+        :param base_currency: e.g. BTC
+        :return: names of markets which trade against base_currency
+        """
+        return self.by_base.get(base_currency, _EMPTY)
+
+    def markets_of_currency(self, currency: str) -> Tuple[str, ...]:
+        """
+        :param currency: e.g. LTC
+        :return: names of markets which trade currency
+        """
+        return self.by_currency.get(currency, _EMPTY)
+
+    def is_active(self, market: str) -> bool:
+        return market in self.active
+
+    def validate_order(self, market: str, quantity: float, rate: Optional[float] = None) -> Optional[str]:
+        """
+        Check an order against market info before it is sent
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param quantity: amount to buy or sell
+        :param rate: limit rate
+        :return: error message, None if the order is valid
+        """
+        min_trade_size = self.min_trade_size.get(market)
+        if min_trade_size is None:
+            return f'Unknown market {market}'
+        if market not in self.active:
+            return f'Market {market} is not active'
+        if quantity < min_trade_size:
+            return f'Quantity {quantity:.8f} is below the minimum trade size {min_trade_size:.8f} of {market}'
+        if rate is not None and rate <= 0:
+            return f'Rate {rate:.8f} must be positive'
+        return None
@@ -0,0 +1,242 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from orderbook import LocalOrderBook
+
+# called with order, quantity and rate of every fill; it must lower order.QuantityRemaining
+FillCallback = Callable[[Any, float, float], None]
+
+
+class _Side:
+    """
+    Open paper orders of one side of a market, best limit first and oldest first within a limit.
+
+    Like the sides of LocalOrderBook, limits are stored negated for buys so that both sides sort ascending, and the
+    orders crossing a rate are always a prefix of the keys.
+    """
+
+    def __init__(self, descending: bool):
+        self._sign = -1.0 if descending else 1.0
+        self._keys: List[Tuple[float, int]] = []
+        self._orders: Dict[Tuple[float, int], Any] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, order, sequence: int) -> Tuple[float, int]:
+        key = (self._sign * order.Limit, sequence)
+        insort(self._keys, key)
+        self._orders[key] = order
+        return key
+
+    def remove(self, key: Tuple[float, int]):
+        if self._orders.pop(key, None) is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def crossing(self, rate: float) -> List[Tuple[Tuple[float, int], Any]]:
+        """Orders whose limit is as good as or better than `rate` for the other side, best first"""
+        bound = self._sign * rate
+        result = []
+        for key in self._keys:
+            if key[0] > bound:
+                break
+            result.append((key, self._orders[key]))
+        return result
+
+
+class MatchingEngine:
+    """
+    Matches paper limit orders against market data as it arrives.
+
+    Open orders are indexed per market and side, sorted by limit, so an update only visits the orders which cross
+    it. A ticker fills crossing orders completely, at the better of their limit and the bid or ask. An order book
+    fills them level by level against the quantity on the book, so orders larger than the book fill partially.
+    The last bid and ask of every market is kept with the time they arrived, so a new order which already crosses
+    is filled when it is added, as long as they are not older than `max_touch_age`. Otherwise the order waits for
+    the next update of its market.
+
+    Every market has its own reentrant lock, held while its orders are matched, so updates of different markets run
+    in parallel. Holding `lock(market)` makes a check and a change of an order of that market atomic, e.g. a cancel
+    can not be followed by a fill.
+    """
+
+    def __init__(self, on_fill: FillCallback, max_touch_age: Optional[float] = None):
+        """
+        :param on_fill: applies a fill to an order
+        :param max_touch_age: seconds the last bid and ask are used to fill new orders, None for no limit
+        """
+        self.on_fill = on_fill
+        self.max_touch_age = max_touch_age
+        self._registry_lock = threading.Lock()
+        self._locks: Dict[str, threading.RLock] = {}
+        self._sequence = count()
+        self._sides: Dict[str, Tuple[_Side, _Side]] = {}
+        self._index: Dict[str, Tuple[str, bool, Tuple[float, int]]] = {}
+        self._touch: Dict[str, Tuple[Optional[float], Optional[float], float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lock(self, market: str) -> threading.RLock:
+        """
+        :param market: BASE-QUOTE(BTC-USDT)
+        :return: the lock held while orders of the market are matched
+        """
+        lock = self._locks.get(market)
+        if lock is None:
+            with self._registry_lock:
+                lock = self._locks.get(market)
+                if lock is None:
+                    self._sides[market] = (_Side(descending=True), _Side(descending=False))
+                    lock = self._locks[market] = threading.RLock()
+        return lock
+
+    @staticmethod
+    def _is_buy(order) -> bool:
+        return order.OrderType.endswith('BUY')
+
+    def add(self, order) -> int:
+        """
+        Index an open order, and match it against the last bid and ask of its market if they are recent enough
+
+        :param order: order with OrderUuid, Exchange, OrderType, Limit and QuantityRemaining
+        :return: number of fills
+        """
+        market = order.Exchange
+        with self.lock(market):
+            is_buy = self._is_buy(order)
+            key = self._sides[market][0 if is_buy else 1].add(order, next(self._sequence))
+            self._index[order.OrderUuid] = (market, is_buy, key)
+            touch = self._touch.get(market)
+            if touch is None:
+                return 0
+            bid, ask, arrived = touch
+            if self.max_touch_age is not None and time.monotonic() - arrived > self.max_touch_age:
+                return 0
+            return self._match_touch(market, bid, ask)
+
+    def remove(self, uuid: str) -> bool:
+        """
+        Stop matching an order, e.g. when it is canceled
+
+        :param uuid: order uuid
+        :return: False if the order was not indexed
+        """
+        entry = self._index.get(uuid)
+        if entry is None:
+            return False
+        with self.lock(entry[0]):
+            return self._remove(uuid)
+
+    def _remove(self, uuid: str) -> bool:
+        """Called with the lock of the market of the order held"""
+        entry = self._index.pop(uuid, None)
+        if entry is None:
+            return False
+        market, is_buy, key = entry
+        self._sides[market][0 if is_buy else 1].remove(key)
+        return True
+
+    def markets(self) -> List[str]:
+        """
+        :return: markets with open orders
+        """
+        return [market for market, (buys, sells) in list(self._sides.items()) if len(buys) or len(sells)]
+
+    def has_orders(self, market: str) -> bool:
+        sides = self._sides.get(market)
+        return sides is not None and bool(len(sides[0]) or len(sides[1]))
+
+    def _fill(self, order, quantity: float, rate: float):
+        self.on_fill(order, quantity, rate)
+        if order.QuantityRemaining <= 0:
+            self._remove(order.OrderUuid)
+
+    def on_ticker(self, market: str, bid: Optional[float], ask: Optional[float]) -> int:
+        """
+        Fill orders crossing the bid or ask of a market
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param bid: highest bid
+        :param ask: lowest ask
+        :return: number of fills
+        """
+        with self.lock(market):
+            self._touch[market] = (bid, ask, time.monotonic())
+            return self._match_touch(market, bid, ask)
+
+    def _match_touch(self, market: str, bid: Optional[float], ask: Optional[float]) -> int:
+        """Called with the lock of the market held"""
+        fills = 0
+        buys, sells = self._sides[market]
+        if ask:
+            for _, order in buys.crossing(ask):
+                self._fill(order, order.QuantityRemaining, min(order.Limit, ask))
+                fills += 1
+        if bid:
+            for _, order in sells.crossing(bid):
+                self._fill(order, order.QuantityRemaining, max(order.Limit, bid))
+                fills += 1
+        return fills
+
+    def on_range(self, market: str, low: float, high: float) -> int:
+        """
+        Fill orders whose limit was traded through within a period, e.g. a candle, at their limit
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param low: lowest rate of the period
+        :param high: highest rate of the period
+        :return: number of fills
+        """
+        fills = 0
+        with self.lock(market):
+            buys, sells = self._sides[market]
+            for _, order in buys.crossing(low):
+                self._fill(order, order.QuantityRemaining, order.Limit)
+                fills += 1
+            for _, order in sells.crossing(high):
+                self._fill(order, order.QuantityRemaining, order.Limit)
+                fills += 1
+        return fills
+
+    def on_orderbook(self, market: str, book: LocalOrderBook) -> int:
+        """
+        Fill orders crossing an order book of a market against the quantity of its levels
+
+        :param market: BASE-QUOTE(BTC-USDT)
+        :param book: LocalOrderBook
+        :return: number of fills
+        """
+        bid = book.best_bid
+        ask = book.best_ask
+        fills = 0
+        with self.lock(market):
+            self._touch[market] = (bid, ask, time.monotonic())
+            buys, sells = self._sides[market]
+            if ask is not None:
+                fills += self._match_levels(buys.crossing(ask), book.asks.iter_levels(), 1.0)
+            if bid is not None:
+                fills += self._match_levels(sells.crossing(bid), book.bids.iter_levels(), -1.0)
+        return fills
+
+    def _match_levels(self, orders: List[Tuple[Any, Any]], levels: Iterator[Tuple[float, float]],
+                      sign: float) -> int:
+        """Fill orders, best limit first, from book levels, best rate first, while the rate crosses the limit"""
+        fills = 0
+        level = next(levels, None)
+        available = level[1] if level is not None else 0.0
+        for _, order in orders:
+            while level is not None and order.QuantityRemaining > 0 and sign * level[0] <= sign * order.Limit:
+                quantity = min(order.QuantityRemaining, available)
+                self._fill(order, quantity, level[0])
+                fills += 1
+                available -= quantity
+                if available <= 0:
+                    level = next(levels, None)
+                    available = level[1] if level is not None else 0.0
+            if level is None:
+                break
+        return fills
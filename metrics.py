@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prodict import Prodict
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PHASES = ('queue_wait', 'sign', 'network', 'decode')
+
+
+class QueryEvent(Prodict):
+    method: str
+    group: str
+    queue_wait: float
+    sign: float
+    network: float
+    decode: float
+    payload_size: int
+    error: Any
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds, in the Prometheus sense"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return result
+
+    def snapshot(self) -> dict:
+        return dict(count=self.count, sum=self.sum, buckets=dict(self.cumulative()))
+
+
+class _MethodMetrics:
+    def __init__(self):
+        self.success = 0
+        self.error = 0
+        self.phases = {phase: Histogram(LATENCY_BUCKETS) for phase in PHASES}
+        self.payload_size = Histogram(SIZE_BUCKETS)
+
+
+class QueryMetrics:
+    """
+    Per-method latency and payload metrics of API calls.
+
+    Every sent query is recorded with the time spent waiting for the rate limiter(queue_wait), signing the url,
+    on the network and decoding the JSON response, plus the payload size and whether it failed. Cache hits are not
+    sent, so they are not recorded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _MethodMetrics] = {}
+        self._callbacks: List[Callable[[QueryEvent], None]] = []
+
+    def add_callback(self, callback: Callable[[QueryEvent], None]):
+        """
+        Call a function with the QueryEvent of every query
+
+        :param callback: function(QueryEvent)
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[QueryEvent], None]):
+        self._callbacks.remove(callback)
+
+    def record(self, event: QueryEvent):
+        with self._lock:
+            metrics = self._methods.get(event.method)
+            if metrics is None:
+                metrics = self._methods[event.method] = _MethodMetrics()
+            if event.error:
+                metrics.error += 1
+            else:
+                metrics.success += 1
+            for phase in PHASES:
+                if event[phase] is not None:
+                    metrics.phases[phase].observe(event[phase])
+            if event.payload_size is not None:
+                metrics.payload_size.observe(event.payload_size)
+
+        for callback in self._callbacks:
+            try:
+                callback(event)
+            except Exception as exception1:
+                print('Exception in metrics callback:{}'.format(exception1))
+
+    def snapshot(self, method: Optional[str] = None) -> dict:
+        """
+        In-memory snapshot of all metrics
+
+        :param method: only this method, None for all
+        :return: dict of method -> {success, error, queue_wait, sign, network, decode, payload_size}
+        """
+        with self._lock:
+            result = {}
+            for name, metrics in self._methods.items():
+                if method is not None and name != method:
+                    continue
+                entry = dict(success=metrics.success, error=metrics.error)
+                for phase, histogram in metrics.phases.items():
+                    entry[phase] = histogram.snapshot()
+                entry['payload_size'] = metrics.payload_size.snapshot()
+                result[name] = entry
+            return result
+
+    def to_prometheus(self, prefix: str = 'bittrex') -> str:
+        """
+        Metrics in Prometheus text exposition format
+
+        :param prefix: metric name prefix
+        :return: str
+        """
+        lines = [f'# TYPE {prefix}_requests_total counter']
+        with self._lock:
+            methods = sorted(self._methods.items())
+            for name, metrics in methods:
+                lines.append(f'{prefix}_requests_total{{method="{name}",status="success"}} {metrics.success}')
+                lines.append(f'{prefix}_requests_total{{method="{name}",status="error"}} {metrics.error}')
+
+            histograms = [(f'{prefix}_{phase}_seconds', lambda m, p=phase: m.phases[p]) for phase in PHASES]
+            histograms.append((f'{prefix}_payload_bytes', lambda m: m.payload_size))
+            for metric_name, get_histogram in histograms:
+                lines.append(f'# TYPE {metric_name} histogram')
+                for name, metrics in methods:
+                    histogram = get_histogram(metrics)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric_name}_bucket{{method="{name}",le="{bound}"}} {count}')
+                    lines.append(f'{metric_name}_sum{{method="{name}"}} {histogram.sum}')
+                    lines.append(f'{metric_name}_count{{method="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
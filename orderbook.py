@@ -0,0 +1,263 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BUY = "BUY"
+SELL = "SELL"
+
+
+class _BookSide:
+    """
+    One side of an order book, kept sorted best price first.
+
+    Rates are stored as sort keys (negated for bids) so that both sides are ascending and can be searched with
+    `bisect`. Cumulative quantity and notional arrays are rebuilt lazily after updates, so every query is a binary
+    search.
+    """
+
+    def __init__(self, descending: bool):
+        self._sign = -1.0 if descending else 1.0
+        self._keys: List[float] = []
+        self._quantities: Dict[float, float] = {}
+        self._cum_quantity = array('d')
+        self._cum_notional = array('d')
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._keys)
+
+    def set(self, rate: float, quantity: float):
+        key = self._sign * rate
+        if quantity <= 0:
+            if self._quantities.pop(key, None) is not None:
+                del self._keys[bisect_left(self._keys, key)]
+                self._dirty = True
+            return
+        if key not in self._quantities:
+            insort(self._keys, key)
+        self._quantities[key] = quantity
+        self._dirty = True
+
+    def quantity_at(self, rate: float) -> float:
+        return self._quantities.get(self._sign * rate, 0.0)
+
+    def levels(self) -> Dict[float, float]:
+        return {self._sign * key: quantity for key, quantity in self._quantities.items()}
+
+    def iter_levels(self) -> Iterator[Tuple[float, float]]:
+        """(rate, quantity) from the best price down"""
+        for key in self._keys:
+            yield self._sign * key, self._quantities[key]
+
+    def clear(self):
+        self._keys.clear()
+        self._quantities.clear()
+        self._dirty = True
+
+    def _rebuild(self):
+        cum_quantity = array('d', bytes(8 * len(self._keys)))
+        cum_notional = array('d', bytes(8 * len(self._keys)))
+        total_quantity = 0.0
+        total_notional = 0.0
+        for i, key in enumerate(self._keys):
+            quantity = self._quantities[key]
+            total_quantity += quantity
+            total_notional += quantity * key * self._sign
+            cum_quantity[i] = total_quantity
+            cum_notional[i] = total_notional
+        self._cum_quantity = cum_quantity
+        self._cum_notional = cum_notional
+        self._dirty = False
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        if not self._keys:
+            return None
+        key = self._keys[0]
+        return self._sign * key, self._quantities[key]
+
+    def depth_to(self, rate: float) -> float:
+        """Total quantity at prices as good as or better than `rate`"""
+        if self._dirty:
+            self._rebuild()
+        index = bisect_right(self._keys, self._sign * rate)
+        return self._cum_quantity[index - 1] if index else 0.0
+
+    def fill(self, quantity: float) -> Optional[Tuple[float, float]]:
+        """
+        Average and worst price of filling `quantity` from the best price down.
+
+        :return: (vwap, worst rate), None if the side is not deep enough
+        """
+        if self._dirty:
+            self._rebuild()
+        if quantity <= 0 or not self._keys:
+            return None
+        index = bisect_left(self._cum_quantity, quantity)
+        if index == len(self._keys):
+            return None
+        rate = self._sign * self._keys[index]
+        filled_quantity = self._cum_quantity[index - 1] if index else 0.0
+        filled_notional = self._cum_notional[index - 1] if index else 0.0
+        notional = filled_notional + (quantity - filled_quantity) * rate
+        return notional / quantity, rate
+
+
+class LocalOrderBook:
+    """
+    Local order book with fast depth queries.
+
+    Both sides are kept sorted by price, best first, with cumulative depth arrays. Best bid/ask is O(1), and depth,
+    VWAP and slippage queries are O(log n). Successive `getorderbook` snapshots can be applied as diffs so that only
+    changed price levels are touched.
+
+    Order types follow Bittrex: a BUY order takes liquidity from the sell side(asks) and a SELL order from the buy
+    side(bids).
+    """
+
+    def __init__(self, market: Optional[str] = None):
+        self.market = market
+        self.bids = _BookSide(descending=True)
+        self.asks = _BookSide(descending=False)
+
+    @classmethod
+    def from_orderbook(cls, orderbook, market: Optional[str] = None) -> 'LocalOrderBook':
+        """
+        Build from a BittrexOrderBook
+
+        :param orderbook: BittrexOrderBook
+        :param market: BASE-QUOTE(BTC-USDT)
+        :return: LocalOrderBook
+        """
+        book = cls(market)
+        book.apply_snapshot(orderbook)
+        return book
+
+    def _side(self, side: str) -> _BookSide:
+        return self.bids if side == 'buy' else self.asks
+
+    def _taker_side(self, order_type: str) -> _BookSide:
+        return self.asks if order_type == BUY else self.bids
+
+    def diff(self, orderbook) -> List[Tuple[str, float, float]]:
+        """
+        Price levels which differ between this book and a newer snapshot.
+
+        :param orderbook: BittrexOrderBook
+        :return: List[(side, rate, quantity)], quantity 0 means the level is gone
+        """
+        changes = []
+        for side_name in ('buy', 'sell'):
+            side = self._side(side_name)
+            old_levels = side.levels()
+            new_levels = {}
+            for level in orderbook.get(side_name) or []:
+                new_levels[level['Rate']] = new_levels.get(level['Rate'], 0.0) + level['Quantity']
+            for rate, quantity in new_levels.items():
+                if old_levels.get(rate) != quantity:
+                    changes.append((side_name, rate, quantity))
+            for rate in old_levels.keys() - new_levels.keys():
+                changes.append((side_name, rate, 0.0))
+        return changes
+
+    def apply_diff(self, changes: List[Tuple[str, float, float]]):
+        """
+        Apply price level changes
+
+        :param changes: List[(side, rate, quantity)] where side is 'buy' or 'sell', quantity 0 removes the level
+        """
+        for side_name, rate, quantity in changes:
+            self._side(side_name).set(rate, quantity)
+
+    def apply_snapshot(self, orderbook) -> List[Tuple[str, float, float]]:
+        """
+        Update the book to a newer snapshot by applying only the changed levels.
+
+        :param orderbook: BittrexOrderBook
+        :return: applied changes
+        """
+        changes = self.diff(orderbook)
+        self.apply_diff(changes)
+        return changes
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        best = self.bids.best()
+        return best[0] if best else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        best = self.asks.best()
+        return best[0] if best else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if not self.bids or not self.asks:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> Optional[float]:
+        if not self.bids or not self.asks:
+            return None
+        return self.best_ask - self.best_bid
+
+    @property
+    def microprice(self) -> Optional[float]:
+        """Mid price weighted by the quantities at the top of the book"""
+        if not self.bids or not self.asks:
+            return None
+        bid, bid_quantity = self.bids.best()
+        ask, ask_quantity = self.asks.best()
+        return (bid * ask_quantity + ask * bid_quantity) / (bid_quantity + ask_quantity)
+
+    def depth_within_percent(self, percent: float, side: str) -> float:
+        """
+        Quantity resting within `percent` of the mid price.
+
+        :param percent: distance from mid price, e.g. 1 for 1%
+        :param side: 'buy'(bids) or 'sell'(asks)
+        :return: quantity
+        """
+        mid = self.mid
+        if mid is None:
+            return 0.0
+        if side == 'buy':
+            return self.bids.depth_to(mid * (1 - percent / 100))
+        return self.asks.depth_to(mid * (1 + percent / 100))
+
+    def vwap(self, quantity: float, order_type: str) -> Optional[float]:
+        """
+        Average price of filling `quantity` at market.
+
+        :param quantity: amount to buy or sell
+        :param order_type: BittrexOrderType.BUY or BittrexOrderType.SELL
+        :return: volume weighted average price, None if the book is not deep enough
+        """
+        fill = self._taker_side(order_type).fill(quantity)
+        return fill[0] if fill else None
+
+    def fill_price(self, quantity: float, order_type: str) -> Optional[float]:
+        """
+        Limit price needed to fill `quantity` at once.
+
+        :param quantity: amount to buy or sell
+        :param order_type: BittrexOrderType.BUY or BittrexOrderType.SELL
+        :return: worst rate touched, None if the book is not deep enough
+        """
+        fill = self._taker_side(order_type).fill(quantity)
+        return fill[1] if fill else None
+
+    def slippage(self, quantity: float, order_type: str) -> Optional[float]:
+        """
+        Slippage of filling `quantity` at market compared to the top of the book.
+
+        :param quantity: amount to buy or sell
+        :param order_type: BittrexOrderType.BUY or BittrexOrderType.SELL
+        :return: percent, None if the book is not deep enough
+        """
+        side = self._taker_side(order_type)
+        fill = side.fill(quantity)
+        if fill is None:
+            return None
+        best = side.best()[0]
+        return 100 * abs(fill[0] - best) / best
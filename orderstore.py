@@ -0,0 +1,241 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from prodict import Prodict
+
+from timeparse import to_epoch
+
+_EPOCH = datetime(1970, 1, 1)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS orders (
+    uuid TEXT PRIMARY KEY,
+    market TEXT NOT NULL,
+    time REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    order_type TEXT NOT NULL,
+    side TEXT NOT NULL,
+    limit_rate REAL,
+    quantity REAL NOT NULL,
+    quantity_remaining REAL NOT NULL,
+    commission REAL NOT NULL,
+    price REAL NOT NULL,
+    price_per_unit REAL,
+    is_conditional INTEGER,
+    condition TEXT,
+    condition_target TEXT,
+    immediate_or_cancel INTEGER
+);
+CREATE INDEX IF NOT EXISTS orders_market_time ON orders (market, time);
+CREATE INDEX IF NOT EXISTS orders_time ON orders (time);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT PRIMARY KEY,
+    time REAL NOT NULL
+);
+'''
+
+_INSERT = '''
+INSERT OR IGNORE INTO orders (uuid, market, time, timestamp, order_type, side, limit_rate, quantity,
+                              quantity_remaining, commission, price, price_per_unit, is_conditional, condition,
+                              condition_target, immediate_or_cancel)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_ALL_MARKETS = '*'
+
+
+class MarketPnL(Prodict):
+    market: str
+    bought: float
+    sold: float
+    cost: float
+    proceeds: float
+    commission: float
+    average_cost: float
+    realized_pnl: float
+
+
+class DailyVolume(Prodict):
+    day: str
+    market: str
+    orders: int
+    quantity: float
+    volume: float
+
+
+class OrderHistoryStore:
+    """
+    Local SQLite copy of the order history, indexed by uuid, market and time.
+
+    `sync` reads the order history newest first and stops as soon as it reaches orders older than the previous
+    sync, so reconciling only decodes the new orders. Closed orders never change, so stored rows are never updated.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        """
+        :param path: database file, ':memory:' for a store which is not persisted
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def _epoch(dt: Optional[datetime]) -> Optional[float]:
+        return (dt - _EPOCH).total_seconds() if dt is not None else None
+
+    def _watermark(self, scope: str) -> Optional[float]:
+        row = self._db.execute('SELECT time FROM sync_state WHERE scope = ?', (scope,)).fetchone()
+        return row[0] if row else None
+
+    def add(self, orders) -> int:
+        """
+        Store orders, skipping the ones already stored
+
+        :param orders: iterable of BittrexOrderHistory or its records
+        :return: number of new orders
+        """
+        rows = []
+        for order in orders:
+            order_type = order['OrderType']
+            rows.append((order['OrderUuid'], order['Exchange'], to_epoch(order['TimeStamp']), order['TimeStamp'],
+                         order_type, 'BUY' if order_type.endswith('BUY') else 'SELL', order['Limit'],
+                         order['Quantity'], order['QuantityRemaining'] or 0, order['Commission'] or 0,
+                         order['Price'] or 0, order['PricePerUnit'], order['IsConditional'], order['Condition'],
+                         order['ConditionTarget'], order['ImmediateOrCancel']))
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(_INSERT, rows)
+            return self._db.total_changes - before
+
+    def sync(self, client, market: Optional[str] = None, full: bool = False) -> Tuple[Any, int]:
+        """
+        Fetch orders newer than the last sync and store them
+
+        :param client: Bittrex instance
+        :param market: BASE-QUOTE(BTC-USDT), None for all markets
+        :param full: read the whole history instead of stopping at the last sync, e.g. to fill gaps
+        :return: error(if any), number of new orders
+        """
+        scope = market or _ALL_MARKETS
+        with self._lock:
+            watermark = None if full else self._watermark(scope)
+
+        err, orders = client.iter_order_history(market)
+        if err:
+            return err, 0
+
+        new_orders = []
+        latest = watermark
+        for order in orders:
+            timestamp = to_epoch(order['TimeStamp'])
+            if watermark is not None and timestamp < watermark:
+                orders.close()
+                break
+            new_orders.append(order)
+            latest = timestamp if latest is None else max(latest, timestamp)
+
+        added = self.add(new_orders)
+        if latest is not None:
+            with self._lock, self._db:
+                self._db.execute('INSERT OR REPLACE INTO sync_state (scope, time) VALUES (?, ?)', (scope, latest))
+        return err, added
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+    def _where(self, market: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> Tuple[str, list]:
+        conditions = []
+        parameters = []
+        if market is not None:
+            conditions.append('market = ?')
+            parameters.append(market)
+        if start is not None:
+            conditions.append('time >= ?')
+            parameters.append(self._epoch(start))
+        if end is not None:
+            conditions.append('time < ?')
+            parameters.append(self._epoch(end))
+        return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), parameters
+
+    def orders(self, market: Optional[str] = None, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> List[dict]:
+        """
+        Stored orders, newest first
+
+        :param market: BASE-QUOTE(BTC-USDT), None for all markets
+        :param start: only orders at or after this UTC time
+        :param end: only orders before this UTC time
+        :return: List[dict] with the fields of BittrexOrderHistory
+        """
+        where, parameters = self._where(market, start, end)
+        with self._lock:
+            rows = self._db.execute('SELECT uuid, market, timestamp, order_type, limit_rate, quantity, '
+                                    'quantity_remaining, commission, price, price_per_unit, is_conditional, '
+                                    'condition, condition_target, immediate_or_cancel FROM orders' + where +
+                                    ' ORDER BY time DESC', parameters).fetchall()
+        fields = ('OrderUuid', 'Exchange', 'TimeStamp', 'OrderType', 'Limit', 'Quantity', 'QuantityRemaining',
+                  'Commission', 'Price', 'PricePerUnit', 'IsConditional', 'Condition', 'ConditionTarget',
+                  'ImmediateOrCancel')
+        orders = [dict(zip(fields, row)) for row in rows]
+        for order in orders:
+            order['IsConditional'] = bool(order['IsConditional'])
+            order['ImmediateOrCancel'] = bool(order['ImmediateOrCancel'])
+        return orders
+
+    def realized_pnl(self, market: Optional[str] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Dict[str, MarketPnL]:
+        """
+        Realized profit and loss per market at average cost, in the base currency of the market.
+
+        Sold quantity is valued at the average cost of everything bought in the period, commissions included.
+
+        :param market: BASE-QUOTE(BTC-USDT), None for all markets
+        :param start: only orders at or after this UTC time
+        :param end: only orders before this UTC time
+        :return: dict of market -> MarketPnL
+        """
+        where, parameters = self._where(market, start, end)
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT market, '
+                "SUM(CASE WHEN side = 'BUY' THEN quantity - quantity_remaining ELSE 0 END), "
+                "SUM(CASE WHEN side = 'SELL' THEN quantity - quantity_remaining ELSE 0 END), "
+                "SUM(CASE WHEN side = 'BUY' THEN price + commission ELSE 0 END), "
+                "SUM(CASE WHEN side = 'SELL' THEN price - commission ELSE 0 END), "
+                'SUM(commission) '
+                'FROM orders' + where + ' GROUP BY market', parameters).fetchall()
+
+        result = {}
+        for market_name, bought, sold, cost, proceeds, commission in rows:
+            average_cost = cost / bought if bought else 0.0
+            result[market_name] = MarketPnL(market=market_name, bought=bought, sold=sold, cost=cost,
+                                            proceeds=proceeds, commission=commission, average_cost=average_cost,
+                                            realized_pnl=proceeds - average_cost * sold if bought else 0.0)
+        return result
+
+    def volume_per_day(self, market: Optional[str] = None, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None) -> List[DailyVolume]:
+        """
+        Filled quantity and volume in the base currency per UTC day and market
+
+        :param market: BASE-QUOTE(BTC-USDT), None for all markets
+        :param start: only orders at or after this UTC time
+        :param end: only orders before this UTC time
+        :return: List[DailyVolume] sorted by day and market
+        """
+        where, parameters = self._where(market, start, end)
+        with self._lock:
+            rows = self._db.execute("SELECT date(time, 'unixepoch') AS day, market, COUNT(*), "
+                                    'SUM(quantity - quantity_remaining), SUM(price) '
+                                    'FROM orders' + where + ' GROUP BY day, market ORDER BY day, market',
+                                    parameters).fetchall()
+        return [DailyVolume(day=day, market=market_name, orders=orders, quantity=quantity, volume=volume)
+                for day, market_name, orders, quantity, volume in rows]
@@ -1,17 +1,24 @@
 import threading
-import time
-import random
 import uuid
+from collections import deque
 from datetime import datetime
-from typing import Tuple, Any, Optional, List
+from typing import Tuple, Any, Optional, List, Dict, Deque, Callable
 
 from bittrex import Bittrex, BittrexBuyLimit, BittrexSellLimit, BittrexOpenOrder, BittrexOrder, \
     BittrexBalance, BittrexOpenOrderType
 from prodict import Prodict
+from cache import QueryCache
+from markets import split_market_name
+from matching import MatchingEngine
+from metrics import QueryMetrics
+from orderbook import LocalOrderBook
+from ratelimit import RateLimiter
+from scheduler import RequestScheduler
+from transport import Transport
 
 
 def gen_id():
-    str(uuid.uuid4())
+    return str(uuid.uuid4())
 
 
 def now():
@@ -54,12 +61,10 @@ class CompleteOrder(Prodict):
 class Papertrex(Bittrex):
     """
     Class to make almost real operations on paper. No real buy or sell limit is issued. But keeps tracks of actions.
-    Simulates buy or sell order.
+    Simulates buy or sell orders by matching them against real market data.
     """
-
-    @classmethod
-    def _create_buy_order(cls, market, quantity, buy_price):
-        pass
+    # seconds a fetched bid and ask fill new orders at once when there is no matcher thread
+    MAX_TOUCH_AGE = 1.0
 
     @classmethod
     def _to_open_order(cls, co: CompleteOrder) -> BittrexOpenOrder:
@@ -113,127 +118,180 @@ class Papertrex(Bittrex):
 
         return bo
 
-    def __init__(self, apikey: str, secret: str, rate_limit: int = 5, account_name: str = 'NOT_PRIVODED',
-                 http_keep_alive: bool = False, understood=""):
-        super().__init__(apikey, secret, rate_limit, account_name, http_keep_alive, understood)
-        self._orders: List[CompleteOrder] = []
-        self._spawn_order_issue_agent()
+    COMMISSION_RATE = 0.0025
 
-    def _spawn_order_issue_agent(self):
-        t = threading.Thread(target=self._order_issue_agent, daemon=True)
+    def __init__(self, apikey: str, secret: str, rate_limit: int = 5, account_name: str = 'NOT_PRIVODED',
+                 http_keep_alive: bool = False, understood="", rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[QueryCache] = None, fast_decode: bool = False,
+                 transport: Optional[Transport] = None, metrics: Optional[QueryMetrics] = None,
+                 scheduler: Optional[RequestScheduler] = None, lazy: bool = False,
+                 market_info_path: Optional[str] = None, headless: bool = False, match_interval: float = 1.0,
+                 closed_order_retention: Optional[int] = 10000,
+                 initial_balances: Optional[Dict[str, float]] = None):
+        """
+        Paper orders are filled by a MatchingEngine from real market data: tickers, order books and summaries
+        fetched through this instance are matched against them, and a background thread polls the summaries
+        snapshot every `match_interval` seconds while there are open paper orders.
+
+        Orders are indexed by uuid, and open orders by market. Closed orders are archived, and only the latest
+        `closed_order_retention` of them are kept for get_order.
+
+        State changes of an order happen with the engine lock of its market held, so fills, cancels and reads of
+        an order are atomic, while orders of different markets are handled in parallel.
+
+        :param match_interval: seconds between market data polls of the matcher, 0 to only match fetched data.
+            A new order is filled at once against the last bid and ask of its market only if they are not older
+            than this, or MAX_TOUCH_AGE without a matcher; otherwise the next update of the market fills it.
+        :param closed_order_retention: number of closed orders to keep, None to keep all of them
+        :param initial_balances: dict of currency -> paper balance. Fills are settled against it, orders are
+            rejected when it is not enough, and get_balance(s) return it. None to not track balances.
+        """
+        # paper state exists before the base class warms up, since warm-up already calls the overridden get_ticker
+        self._orders: Dict[str, CompleteOrder] = {}
+        self._open_orders: Dict[str, Dict[str, CompleteOrder]] = {}
+        self._closed_orders: Deque[str] = deque()
+        self._archive_lock = threading.Lock()
+        self.closed_order_retention = closed_order_retention
+        self.match_interval = match_interval
+        self.engine = MatchingEngine(self._fill, max_touch_age=match_interval or self.MAX_TOUCH_AGE)
+        self._clock: Callable[[], datetime] = now
+        self._balances: Optional[Dict[str, float]] = dict(initial_balances) if initial_balances is not None else None
+        self._reserved: Dict[str, float] = {}
+        self._balance_lock = threading.Lock()
+        self._stop_matcher = threading.Event()
+        super().__init__(apikey, secret, rate_limit, account_name, http_keep_alive, understood, rate_limiter, cache,
+                         fast_decode, transport, metrics, scheduler, lazy, market_info_path, headless)
+        if match_interval:
+            self._spawn_matcher()
+
+    def _spawn_matcher(self):
+        t = threading.Thread(target=self._matcher, name='PapertrexMatcher', daemon=True)
         t.start()
 
-    def _fulfill_order(self, order: CompleteOrder):
-        order.Closed = now().strftime(self.DATETIME_PARSE_FORMAT)
-        order.CancelInitiated = False
-        order.QuantityRemaining = 0
-        order.PricePerUnit = order.Limit
-        order.Price = order.Quantity * order.Limit
-
-    def _partly_fill_order(self, order: CompleteOrder):
-        amount = random.uniform(0.0001, order.QuantityRemaining)
-        amount = min(amount, order.Quantity)
-        order.QuantityRemaining = amount
-        order.PricePerUnit = order.Limit
-        order.Price = (order.Quantity - order.QuantityRemaining) * order.Limit
-
-    def _what_to_do_with_order(self, o: CompleteOrder, age):
-        if o.OrderType == BittrexOpenOrderType.LIMIT_BUY or o.Type == BittrexOpenOrderType.LIMIT_BUY:
-            if age < 60:
-                if random.randint(1, 100) <= 100:
-                    return "fulfill"
-
-                if random.randint(1, 100) < 50:
-                    return "partly_fill"
-
-                return "nothing"
-            elif age < 120:
-                if random.randint(1, 100) < 50:
-                    return "fulfill"
-
-                if random.randint(1, 100) < 50:
-                    return "partly_fill"
-
-                return "nothing"
-            elif age < 180:
-                if random.randint(1, 100) < 100:
-                    return "fulfill"
-
-                if random.randint(1, 100) < 15:
-                    return "partly_fill"
-
-                return "nothing"
-
-            return "nothing"
-        else:
-            if age < 60:
-                if random.randint(1, 100) <= 100:
-                    return "fulfill"
-
-                if random.randint(1, 100) < 5:
-                    return "partly_fill"
-
-                return "nothing"
-            elif age < 120:
-                if random.randint(1, 100) < 5:
-                    return "fulfill"
-
-                if random.randint(1, 100) < 5:
-                    return "partly_fill"
-
-                return "nothing"
-            elif age < 180:
-                if random.randint(1, 100) < 5:
-                    return "fulfill"
-
-                if random.randint(1, 100) < 5:
-                    return "partly_fill"
-
-                return "nothing"
-
-            return "nothing"
-
-    def _order_issue_agent(self):
-        while True:
-            time.sleep(20)
-            open_orders = [o for o in self._orders if o.Closed is None]
-            for o in open_orders:
-                age = now().timestamp() - self._parse_dt(o.Opened).timestamp()
-                what_to_do = self._what_to_do_with_order(o, age)
-                if what_to_do == 'nothing':
-                    """---=== Doing nothing to order"""
-                    continue
-                if what_to_do == 'fulfill':
-                    """---=== Fulfilling order"""
-                    self._fulfill_order(o)
-                    continue
-                if what_to_do == 'partly_fill':
-                    """---=== Partly filling order"""
-                    self._partly_fill_order(o)
-                    continue
+    def _matcher(self):
+        while not self._stop_matcher.wait(self.match_interval):
+            if not len(self.engine):
+                continue
+            try:
+                self.snapshot(max_age=self.match_interval)
+            except Exception as exception1:
+                print('Exception in paper matcher:{}'.format(exception1))
+
+    def stop_matcher(self):
+        self._stop_matcher.set()
+
+    def _timestamp(self) -> str:
+        return self._clock().strftime(self.DATETIME_PARSE_FORMAT)
+
+    def _fill(self, order: CompleteOrder, quantity: float, rate: float):
+        """Apply a fill of the matching engine to a paper order"""
+        cost = quantity * rate
+        commission = cost * self.COMMISSION_RATE
+        order.Price += cost
+        order.CommissionPaid += commission
+        order.QuantityRemaining -= quantity
+        released = quantity
+        if order.QuantityRemaining <= order.Quantity * 1e-12:
+            released += order.QuantityRemaining
+            order.QuantityRemaining = 0
+            order.Closed = self._timestamp()
+            order.IsOpen = False
+            self._archive(order)
+        order.PricePerUnit = order.Price / (order.Quantity - order.QuantityRemaining)
+        if self._balances is not None:
+            self._settle(order, quantity, cost, commission, released)
+
+    def _reservation(self, order: CompleteOrder, quantity: float) -> Tuple[str, float]:
+        """Currency and amount an open order holds for `quantity` of it"""
+        base_currency, currency = split_market_name(order.Exchange)
+        if order.OrderType == BittrexOpenOrderType.LIMIT_BUY:
+            return base_currency, quantity * order.Limit * (1 + self.COMMISSION_RATE)
+        return currency, quantity
+
+    def _reserve(self, order: CompleteOrder) -> Optional[str]:
+        reserved_currency, amount = self._reservation(order, order.Quantity)
+        with self._balance_lock:
+            reserved = self._reserved.get(reserved_currency, 0.0)
+            available = self._balances.get(reserved_currency, 0.0) - reserved
+            if amount > available:
+                return f'INSUFFICIENT_FUNDS: {amount:.8f} {reserved_currency} needed, {available:.8f} available'
+            self._reserved[reserved_currency] = reserved + amount
+        return None
+
+    def _settle(self, order: CompleteOrder, quantity: float, cost: float, commission: float, released: float):
+        """Move the funds of a fill between paper balances, and release the reservation of the filled quantity"""
+        base_currency, currency = split_market_name(order.Exchange)
+        reserved_currency, amount = self._reservation(order, released)
+        with self._balance_lock:
+            self._reserved[reserved_currency] = self._reserved.get(reserved_currency, 0.0) - amount
+            if order.OrderType == BittrexOpenOrderType.LIMIT_BUY:
+                self._balances[base_currency] = self._balances.get(base_currency, 0.0) - cost - commission
+                self._balances[currency] = self._balances.get(currency, 0.0) + quantity
+            else:
+                self._balances[currency] = self._balances.get(currency, 0.0) - quantity
+                self._balances[base_currency] = self._balances.get(base_currency, 0.0) + cost - commission
+
+    def _archive(self, order: CompleteOrder):
+        """
+        Move a closed order out of the open orders, and forget the oldest closed orders beyond retention.
+        Called with the lock of the market of the order held.
+        """
+        open_orders = self._open_orders.get(order.Exchange)
+        if open_orders is not None:
+            open_orders.pop(order.Uuid, None)
+            if not open_orders:
+                del self._open_orders[order.Exchange]
+        with self._archive_lock:
+            self._closed_orders.append(order.Uuid)
+            if self.closed_order_retention is not None:
+                while len(self._closed_orders) > self.closed_order_retention:
+                    self._orders.pop(self._closed_orders.popleft(), None)
+
+    def get_ticker(self, market: str):
+        err, ticker = super().get_ticker(market)
+        if not err and ticker is not None:
+            self.engine.on_ticker(market, ticker.Bid, ticker.Ask)
+        return err, ticker
+
+    def get_orderbook(self, market, order_type='both'):
+        err, orderbook = super().get_orderbook(market, order_type)
+        if not err and order_type == 'both' and self.engine.has_orders(market):
+            self.engine.on_orderbook(market, LocalOrderBook.from_orderbook(orderbook, market))
+        return err, orderbook
+
+    def snapshot(self, max_age: float = 1.0) -> Tuple[Any, dict]:
+        err, summaries = super().snapshot(max_age)
+        if not err:
+            for market in self.engine.markets():
+                summary = summaries.get(market)
+                if summary is not None:
+                    self.engine.on_ticker(market, summary.Bid, summary.Ask)
+        return err, summaries
+
+    def _new_order(self, market, quantity, rate, order_type) -> Tuple[Any, Optional[str]]:
+        error = self.validate_order(market, quantity, rate)
+        if error:
+            return error, None
 
-    def buy_limit(self, market, quantity, buy_price) -> Tuple[Any, Optional[BittrexBuyLimit]]:
-        """Paper buy_limit {market}: {quantity:.8f} x {buy_price:.8f}={quantity * buy_price:.8f} BTC"""
-        response: BittrexBuyLimit = BittrexBuyLimit(uuid=gen_id())
         co = CompleteOrder()
-        co.Uuid: str = response.uuid
+        co.Uuid: str = gen_id()
         co.OrderUuid: str = co.Uuid
         co.Exchange: str = market
-        co.OrderType: BittrexOpenOrderType = BittrexOpenOrderType.LIMIT_BUY
+        co.OrderType: BittrexOpenOrderType = order_type
         co.Quantity: float = quantity
         co.QuantityRemaining: float = quantity
-        co.Limit: float = buy_price
+        co.Limit: float = rate
         co.CommissionPaid: float = 0
-        co.Price: float = buy_price
+        co.Price: float = 0
         co.PricePerUnit: Optional[float] = None
-        co.Opened: str = now().strftime(self.DATETIME_PARSE_FORMAT)
+        co.Opened: str = self._timestamp()
         co.CancelInitiated: bool = False
         co.ImmediateOrCancel: bool = False
         co.IsConditional: bool = False
         co.Condition: Optional[str] = None
         co.ConditionTarget: Optional[str] = None
         co.AccountId: Any = None
-        co.Type: BittrexOpenOrderType = BittrexOpenOrderType.LIMIT_BUY
+        co.Type: BittrexOpenOrderType = order_type
         co.Reserved: float = 0
         co.ReserveRemaining: float = 0
         co.CommissionReserved: float = 0
@@ -242,88 +300,92 @@ class Papertrex(Bittrex):
         co.IsOpen: bool = True
         co.Sentinel: str = "sentinel"
 
-        self._orders.append(co)
-        return False, response
+        if self._balances is not None:
+            error = self._reserve(co)
+            if error:
+                return error, None
+
+        with self.engine.lock(market):
+            self._orders[co.Uuid] = co
+            self._open_orders.setdefault(market, {})[co.Uuid] = co
+            self.engine.add(co)
+        return False, co.Uuid
+
+    def buy_limit(self, market, quantity, buy_price) -> Tuple[Any, Optional[BittrexBuyLimit]]:
+        """Paper buy_limit {market}: {quantity:.8f} x {buy_price:.8f}={quantity * buy_price:.8f} BTC"""
+        err, order_uuid = self._new_order(market, quantity, buy_price, BittrexOpenOrderType.LIMIT_BUY)
+        if err:
+            return err, None
+        return err, BittrexBuyLimit(uuid=order_uuid)
 
     def sell_limit(self, market, quantity, sell_price) -> Tuple[Any, Optional[BittrexSellLimit]]:
         """Paper sell_limit {market}: {quantity:.8f} x {sell_price:.8f}={quantity * sell_price:.8f} BTC"""
-        response: BittrexSellLimit = BittrexSellLimit(uuid=gen_id())
-        self._create_buy_order(market, quantity, sell_price)
-        co = CompleteOrder()
-        co.Uuid: str = response.uuid
-        co.OrderUuid: str = co.Uuid
-        co.Exchange: str = market
-        co.OrderType: BittrexOpenOrderType = BittrexOpenOrderType.LIMIT_SELL
-        co.Quantity: float = quantity
-        co.QuantityRemaining: float = quantity
-        co.Limit: float = sell_price
-        co.CommissionPaid: float = 0
-        co.Price: float = sell_price
-        co.PricePerUnit: Optional[float] = None
-        co.Opened: str = now().strftime(self.DATETIME_PARSE_FORMAT)
-        co.CancelInitiated: bool = False
-        co.ImmediateOrCancel: bool = False
-        co.IsConditional: bool = False
-        co.Condition: Optional[str] = None
-        co.ConditionTarget: Optional[str] = None
-        co.AccountId: Any = None
-        co.Type: BittrexOpenOrderType = BittrexOpenOrderType.LIMIT_SELL
-        co.Reserved: float = 0
-        co.ReserveRemaining: float = 0
-        co.CommissionReserved: float = 0
-        co.CommissionReserveRemaining: float = 0
-        co.Closed: Optional[str] = None
-        co.IsOpen: bool = True
-        co.Sentinel: str = "sentinel"
-
-        self._orders.append(co)
-        return False, response
+        err, order_uuid = self._new_order(market, quantity, sell_price, BittrexOpenOrderType.LIMIT_SELL)
+        if err:
+            return err, None
+        return err, BittrexSellLimit(uuid=order_uuid)
 
     def cancel(self, order_uuid) -> Tuple[Any, bool]:
-        order = None
-        for o in self._orders:
-            if o.Uuid == order_uuid:
-                order = o
-                break
+        order = self._orders.get(order_uuid)
         if order:
-            if order.Closed:
-                return "Order already closed", False
-            order.Closed = now().strftime(self.DATETIME_PARSE_FORMAT)
-            order.CancelInitiated = True
-            order.IsOpen = False
-            order.PricePerUnit = order.Limit
-            order.Price = order.PricePerUnit * order.Quantity
+            with self.engine.lock(order.Exchange):
+                if order.Closed or not self.engine.remove(order_uuid):
+                    return "Order already closed", False
+                order.Closed = self._timestamp()
+                order.CancelInitiated = True
+                order.IsOpen = False
+                self._archive(order)
+                if self._balances is not None:
+                    self._settle(order, 0, 0, 0, order.QuantityRemaining)
             """Canceled order: + order.display"""
             return False, True
         """Order not found to cancel: + order_uuid"""
         return "Order not found to cancel", False
 
     def get_open_orders(self, market=None) -> Tuple[Any, List[BittrexOpenOrder]]:
-        result: List[BittrexOpenOrder] = [self._to_open_order(order) for order in self._orders if order.Closed is None]
-
-        # for order in self._orders:
-        #     if order.Closed is None:
-        #         result.append(self._to_open_order(order))
-        # if market is None:
-        #     result.append(self.to_open_order(order))
-        # elif order.Exchange == market:
-        #     result.append(self.to_open_order(order))
-
+        markets = [market] if market is not None else list(self._open_orders)
+        result: List[BittrexOpenOrder] = []
+        for market_name in markets:
+            with self.engine.lock(market_name):
+                result.extend(self._to_open_order(order) for order in self._open_orders.get(market_name, {}).values())
         return False, result
 
     def get_order(self, order_uuid) -> Tuple[Any, Optional[BittrexOrder]]:
-        result: Optional[BittrexOrder] = None
-        for order in self._orders:
-            if order.Uuid == order_uuid:
-                result = self._to_order(order)
-                break
-
-        if result is None:
+        order = self._orders.get(order_uuid)
+        if order is None:
             return "Order not found", None
+        with self.engine.lock(order.Exchange):
+            return False, self._to_order(order)
+
+    def get_orders(self, market=None) -> Tuple[Any, List[BittrexOrder]]:
+        """
+        Paper orders, open and closed, in the order they were placed. Only the latest `closed_order_retention`
+        closed orders are kept.
+
+        :param market: BASE-QUOTE(BTC-USDT), None for all markets
+        :return: error(if any), List[BittrexOrder] taken at the time of the call
+        """
+        result: List[BittrexOrder] = []
+        for order in list(self._orders.values()):
+            if market is not None and order.Exchange != market:
+                continue
+            with self.engine.lock(order.Exchange):
+                result.append(self._to_order(order))
         return False, result
 
+    def _paper_balance(self, currency: str) -> BittrexBalance:
+        balance = self._balances.get(currency, 0.0)
+        return BittrexBalance(Currency=currency, Balance=balance, Available=balance - self._reserved.get(currency, 0.0),
+                              Pending=0.0)
+
     def get_balance(self, currency) -> Tuple[Any, Optional[BittrexBalance]]:
-        pass
+        if self._balances is None:
+            return 'Paper balances are not tracked, pass initial_balances', None
+        with self._balance_lock:
+            return False, self._paper_balance(currency)
 
     def get_balances(self) -> Tuple[Any, List[BittrexBalance]]:
-        pass
+        if self._balances is None:
+            return 'Paper balances are not tracked, pass initial_balances', []
+        with self._balance_lock:
+            return False, [self._paper_balance(currency) for currency in sorted(self._balances)]
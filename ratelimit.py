@@ -0,0 +1,187 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from prodict import Prodict
+
+
+class RateLimiterMetrics(Prodict):
+    rate: float
+    capacity: float
+    tokens_available: float
+    calls: int
+    throttled: int
+    total_wait: float
+    max_wait: float
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Every call takes one token. With the default
+    capacity of one token calls are spaced `1 / rate` apart, so no second sees more than `rate` calls; a larger
+    capacity lets up to `capacity` calls through at once after an idle period. When the bucket is empty the token
+    is borrowed from the future, and the caller is told how long to wait for it. The lock is only held for the
+    bookkeeping, never while sleeping, so waiting callers do not block each other.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        :param rate: tokens per second
+        :param capacity: maximum burst size, defaults to 1
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take one token without waiting.
+
+        :return: seconds to wait before the token can be used
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait_time = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.calls += 1
+            if wait_time > 0:
+                self.throttled += 1
+                self.total_wait += wait_time
+                self.max_wait = max(self.max_wait, wait_time)
+            return wait_time
+
+    def try_acquire(self) -> bool:
+        """
+        Take one token only if it is available right now.
+
+        :return: True if a token was taken
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.calls += 1
+            return True
+
+    def record_wait(self, wait_time: float):
+        """
+        Count a wait that happened outside of `reserve`, e.g. in a scheduler queue.
+
+        :param wait_time: seconds waited
+        """
+        with self._lock:
+            self.throttled += 1
+            self.total_wait += wait_time
+            self.max_wait = max(self.max_wait, wait_time)
+
+    def wait_time(self) -> float:
+        """
+        Seconds until a token is available, without taking it.
+
+        :return: seconds, 0 if a token is available now
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until it is available.
+
+        :return: seconds waited
+        """
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    async def acquire_async(self) -> float:
+        """
+        Take one token, awaiting until it is available.
+
+        :return: seconds waited
+        """
+        import asyncio
+
+        wait_time = self.reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+    @property
+    def tokens_available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(self._tokens, 0.0)
+
+    def metrics(self) -> RateLimiterMetrics:
+        return RateLimiterMetrics(rate=self.rate,
+                                  capacity=self.capacity,
+                                  tokens_available=self.tokens_available,
+                                  calls=self.calls,
+                                  throttled=self.throttled,
+                                  total_wait=self.total_wait,
+                                  max_wait=self.max_wait)
+
+
+class RateLimiter:
+    """
+    Rate limiter with a budget per endpoint group: 'public', 'market' and 'account'.
+
+    By default all groups share one bucket of `rate_limit` calls per second, which is how Bittrex counts requests.
+    Pass a rate for a group to give it a budget of its own.
+    """
+    GROUPS = ('public', 'market', 'account')
+
+    def __init__(self, rate_limit: float = 5, public: Optional[float] = None, market: Optional[float] = None,
+                 account: Optional[float] = None, burst: Optional[float] = None):
+        """
+        :param rate_limit: calls per second shared by groups without a budget of their own
+        :param public: calls per second for public endpoints
+        :param market: calls per second for market(trading) endpoints
+        :param account: calls per second for account endpoints
+        :param burst: bucket capacity, None for no bursts: calls are spaced evenly and never exceed the rate in any
+                      second. A burst of N lets N calls through at once after an idle period.
+        """
+        shared = TokenBucket(rate_limit, burst)
+        rates = dict(public=public, market=market, account=account)
+        self.buckets: Dict[str, TokenBucket] = {
+            group: TokenBucket(rate, burst) if rate else shared for group, rate in rates.items()
+        }
+
+    def bucket(self, group: str) -> TokenBucket:
+        return self.buckets[group]
+
+    def reserve(self, group: str = 'public') -> float:
+        return self.buckets[group].reserve()
+
+    def try_acquire(self, group: str = 'public') -> bool:
+        return self.buckets[group].try_acquire()
+
+    def acquire(self, group: str = 'public') -> float:
+        return self.buckets[group].acquire()
+
+    async def acquire_async(self, group: str = 'public') -> float:
+        return await self.buckets[group].acquire_async()
+
+    def metrics(self) -> Dict[str, RateLimiterMetrics]:
+        """
+        Metrics per group. Groups sharing a bucket report the same numbers.
+
+        :return: dict of group -> RateLimiterMetrics
+        """
+        return {group: bucket.metrics() for group, bucket in self.buckets.items()}
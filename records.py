@@ -0,0 +1,121 @@
+from collections import namedtuple
+from operator import itemgetter
+from typing import Dict, Iterable, List
+
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
+
+class Record(tuple):
+    """
+    Base of compact, read-only response records.
+
+    A record is a named tuple with the fields of a Prodict response class. Fields are read as attributes
+    (`order.Quantity`) or, like a dict, by name (`order['Quantity']`, `order.get('Quantity')`), and `in` tests field
+    names (`'Quantity' in order`) instead of values.
+    """
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            try:
+                return tuple.__getitem__(self, self._index[key])
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def to_dict(self) -> dict:
+        return dict(zip(self._fields, self))
+
+    def to_prodict(self):
+        """
+        Convert to the Prodict response class this record was made from
+
+        :return: Prodict
+        """
+        return self.prodict_cls.from_dict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        try:
+            return tuple.__new__(cls, cls._getter(d))
+        except KeyError:
+            return tuple.__new__(cls, map(d.get, cls._fields))
+
+    @classmethod
+    def from_dicts(cls, items: Iterable[dict]) -> list:
+        getter = cls._getter
+        new = tuple.__new__
+        fields = cls._fields
+        result = []
+        append = result.append
+        for d in items:
+            try:
+                append(new(cls, getter(d)))
+            except KeyError:
+                append(new(cls, map(d.get, fields)))
+        return result
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(f'{k}={v!r}' for k, v in zip(self._fields, self))})"
+
+
+def _nested_from_dict(cls, d: dict):
+    values = list(map(d.get, cls._fields))
+    for index, record in cls._nested:
+        if values[index] is not None:
+            values[index] = record.from_dicts(values[index])
+    return tuple.__new__(cls, values)
+
+
+def _nested_from_dicts(cls, items: Iterable[dict]) -> list:
+    return [cls.from_dict(d) for d in items]
+
+
+def record_type(prodict_cls, name: str = None, nested: Dict[str, type] = None, module: str = None):
+    """
+    Create a Record class with the annotated fields of a Prodict response class.
+    Properties of the Prodict class, like `BittrexTicker.spread`, are copied over.
+
+    Records pickle by reference to their class, so the class must be bound as a global named `name` in `module`.
+
+    :param prodict_cls: Prodict subclass
+    :param name: class name, defaults to prodict class name + 'Record'
+    :param nested: field -> Record class, for fields holding lists of other responses
+    :param module: module the class is bound in, defaults to the module of prodict_cls
+    :return: Record subclass
+    """
+    name = name or prodict_cls.__name__ + 'Record'
+    fields: List[str] = list(prodict_cls.__annotations__)
+    base = namedtuple(prodict_cls.__name__ + 'Fields', fields)
+    namespace = {attr: value for attr, value in vars(prodict_cls).items() if isinstance(value, property)}
+    namespace.update(__slots__=(),
+                     _fields=tuple(fields),
+                     _index={field: i for i, field in enumerate(fields)},
+                     _getter=staticmethod(itemgetter(*fields)) if len(fields) > 1 else
+                     staticmethod(lambda d, _f=fields[0]: (d[_f],)),
+                     prodict_cls=prodict_cls,
+                     __module__=module or prodict_cls.__module__,
+                     __qualname__=name)
+    if nested:
+        namespace.update(_nested=tuple((fields.index(field), record) for field, record in nested.items()),
+                         from_dict=classmethod(_nested_from_dict),
+                         from_dicts=classmethod(_nested_from_dicts))
+    return type(name, (Record, base), namespace)
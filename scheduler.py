@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import insort
+from typing import Dict, List, Optional
+
+from prodict import Prodict
+
+from ratelimit import RateLimiter
+
+
+class Priority:
+    TRADING = 0
+    ACCOUNT = 1
+    PUBLIC = 2
+
+    NAMES = {TRADING: 'trading', ACCOUNT: 'account', PUBLIC: 'public'}
+
+    @classmethod
+    def of(cls, method: str, group: str) -> int:
+        if method in METHOD_PRIORITIES:
+            return METHOD_PRIORITIES[method]
+        return GROUP_PRIORITIES.get(group, cls.PUBLIC)
+
+
+METHOD_PRIORITIES = {
+    'buylimit': Priority.TRADING,
+    'buymarket': Priority.TRADING,
+    'selllimit': Priority.TRADING,
+    'sellmarket': Priority.TRADING,
+    'cancel': Priority.TRADING,
+    'getopenorders': Priority.ACCOUNT,
+}
+
+GROUP_PRIORITIES = {
+    'market': Priority.TRADING,
+    'account': Priority.ACCOUNT,
+    'public': Priority.PUBLIC,
+}
+
+
+class SchedulerStats(Prodict):
+    queued: int
+    granted: dict
+    dropped: dict
+
+
+class _Request:
+    __slots__ = ('key', 'group', 'market', 'deadline', 'granted', 'dropped')
+
+    def __init__(self, key, group, market, deadline):
+        self.key = key
+        self.group = group
+        self.market = market
+        self.deadline = deadline
+        self.granted = False
+        self.dropped = False
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+class RequestScheduler:
+    """
+    Hands out rate limiter tokens by priority instead of first come, first served.
+
+    Trading calls go before account calls, which go before public market data, so an order never waits behind a
+    backlog of polling. Within a priority class, requests of different markets take turns(start-time fair queuing),
+    so one busy market cannot starve the others. A request may have a deadline, after which it is dropped instead of
+    sent, because market data that arrives too late is useless.
+    """
+
+    def __init__(self, rate_limiter: RateLimiter, max_wait: Optional[Dict[int, float]] = None):
+        """
+        :param rate_limiter: RateLimiter whose tokens are scheduled
+        :param max_wait: priority -> seconds a request may wait before it is dropped, e.g. {Priority.PUBLIC: 2}
+        """
+        self.rate_limiter = rate_limiter
+        self.max_wait = dict(max_wait or {})
+
+        self._cond = threading.Condition()
+        self._queue: List[_Request] = []
+        self._sequence = 0
+        self._virtual_time = {priority: 0 for priority in GROUP_PRIORITIES.values()}
+        self._last_tag: Dict[tuple, int] = {}
+        self._granted = {priority: 0 for priority in GROUP_PRIORITIES.values()}
+        self._dropped = {priority: 0 for priority in GROUP_PRIORITIES.values()}
+
+    def acquire(self, method: str, group: str, market: Optional[str] = None, max_wait: Optional[float] = None) -> bool:
+        """
+        Wait for the turn of a request and take a rate limiter token for it.
+
+        :param method: API method
+        :param group: endpoint group, 'public', 'market' or 'account'
+        :param market: market of the request, for fair queuing
+        :param max_wait: seconds after which the request is dropped, defaults to max_wait of its priority
+        :return: True if the request may be sent, False if it was dropped
+        """
+        priority = Priority.of(method, group)
+        if max_wait is None:
+            max_wait = self.max_wait.get(priority)
+        enqueued = time.monotonic()
+        deadline = enqueued + max_wait if max_wait is not None else None
+        waited = False
+
+        with self._cond:
+            self._sequence += 1
+            tag = max(self._virtual_time[priority], self._last_tag.get((priority, market), 0)) + 1
+            self._last_tag[(priority, market)] = tag
+            request = _Request((priority, tag, self._sequence), group, market, deadline)
+            insort(self._queue, request)
+
+            while True:
+                next_check = self._dispatch()
+                if request.granted:
+                    if waited:
+                        self.rate_limiter.bucket(group).record_wait(time.monotonic() - enqueued)
+                    return True
+                if request.dropped:
+                    return False
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    next_check = remaining if next_check is None else min(next_check, remaining)
+                waited = True
+                self._cond.wait(next_check)
+
+    def _dispatch(self) -> Optional[float]:
+        """
+        Grant tokens to queued requests in order. A request whose bucket is empty blocks that bucket for the requests
+        behind it, but not other buckets.
+
+        :return: seconds until the next token is available, None if nothing is waiting for one
+        """
+        now = time.monotonic()
+        next_check = None
+        blocked = set()
+        changed = False
+        remaining = []
+
+        for request in self._queue:
+            if request.deadline is not None and request.deadline <= now:
+                request.dropped = True
+                self._dropped[request.key[0]] += 1
+                self._prune(request)
+                changed = True
+                continue
+
+            bucket = self.rate_limiter.bucket(request.group)
+            if id(bucket) not in blocked and bucket.try_acquire():
+                request.granted = True
+                priority, tag, _ = request.key
+                self._virtual_time[priority] = max(self._virtual_time[priority], tag)
+                self._granted[priority] += 1
+                self._prune(request)
+                changed = True
+                continue
+
+            if id(bucket) not in blocked:
+                blocked.add(id(bucket))
+                wait_time = bucket.wait_time()
+                next_check = wait_time if next_check is None else min(next_check, wait_time)
+            remaining.append(request)
+
+        self._queue = remaining
+        if changed:
+            self._cond.notify_all()
+        return next_check
+
+    def _prune(self, request: _Request):
+        """
+        Forget the last tag of the market of a request once the virtual time reached it, since it no longer delays
+        the next request of that market. Keeps the tags bounded by the markets with requests in flight.
+        """
+        priority = request.key[0]
+        key = (priority, request.market)
+        if self._last_tag.get(key, 0) <= self._virtual_time[priority]:
+            self._last_tag.pop(key, None)
+
+    def stats(self) -> SchedulerStats:
+        with self._cond:
+            return SchedulerStats(queued=len(self._queue),
+                                  granted={Priority.NAMES[p]: count for p, count in self._granted.items()},
+                                  dropped={Priority.NAMES[p]: count for p, count in self._dropped.items()})
@@ -0,0 +1,165 @@
+import itertools
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from prodict import Prodict
+
+from candlestore import CandleStore
+
+# called with the parameters of one run, returns the on_candle callback of Backtrex.run
+StrategyFactory = Callable[[dict], Callable[[Any, str, dict], None]]
+
+
+class SweepResult(Prodict):
+    """
+    Summary of one backtest. Values are in the base currency; slippage_bps is the executed price against the last
+    close when the order was placed, weighted by executed value, positive when worse.
+    """
+    params: dict
+    events: int
+    orders: int
+    filled: int
+    fill_rate: float
+    start_value: float
+    end_value: float
+    pnl: float
+    pnl_percent: float
+    commission: float
+    slippage_bps: float
+    seconds: float
+
+
+def expand_grid(grid: Union[Dict[str, list], Iterable[dict]]) -> List[dict]:
+    """
+    :param grid: dict of parameter -> values to sweep every combination of, or the parameter dicts themselves
+    :return: List[dict] of parameters, one per run
+    """
+    if isinstance(grid, dict):
+        names = list(grid)
+        return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    return [dict(params) for params in grid]
+
+
+def _value(balances: Dict[str, float], prices: Dict[str, float], base_currency: str) -> float:
+    """Worth of balances in base_currency, at prices of BASE-QUOTE markets"""
+    total = 0.0
+    for currency, balance in balances.items():
+        if currency == base_currency:
+            total += balance
+        else:
+            total += balance * prices.get(f'{base_currency}-{currency}', 0.0)
+    return total
+
+
+def run_backtest(store_root: str, markets: List[str], tick_interval: str, strategy: StrategyFactory, params: dict,
+                 initial_balances: Dict[str, float], spread: float = 0.0, base_currency: str = 'BTC',
+                 start: Optional[float] = None, end: Optional[float] = None) -> SweepResult:
+    """
+    Run one backtest and summarize it. Candles are memory-mapped from the store, so concurrent runs in other
+    processes share them through the page cache instead of each holding a copy.
+
+    :param store_root: root of a CandleStore holding the series
+    :param markets: list of BASE-QUOTE(BTC-USDT) to replay
+    :param tick_interval: BittrexTickIntervalTypes
+    :param strategy: picklable function of params returning the on_candle callback
+    :param params: parameters of this run
+    :param initial_balances: dict of currency -> paper balance
+    :param spread: bid-ask spread as a fraction of the close
+    :param base_currency: currency PnL is measured in
+    :param start: replay candles opened at or after this UTC epoch second, None for all
+    :param end: replay candles opened before this UTC epoch second, None for all
+    :return: SweepResult
+    """
+    from backtest import Backtrex, Replay
+
+    replay = Replay.from_store(CandleStore(store_root), markets, tick_interval, start, end)
+    client = Backtrex(replay, initial_balances=initial_balances, spread=spread)
+
+    first = {market: candles.O[0] for market, candles in replay.series.items() if len(candles)}
+    started = time.perf_counter()
+    events = client.run(strategy(params))
+    seconds = time.perf_counter() - started
+    last = {market: candles.C[-1] for market, candles in replay.series.items() if len(candles)}
+
+    orders = filled = 0
+    commission = slippage = executed_value = 0.0
+    err, placed = client.get_orders()
+    for order in placed:
+        orders += 1
+        commission += order.CommissionPaid
+        if not order.QuantityRemaining:
+            filled += 1
+        executed = order.Quantity - order.QuantityRemaining
+        if executed > 0:
+            arrival = client.arrival_prices[order.OrderUuid]
+            side = 1 if order.Type.endswith('BUY') else -1
+            slippage += side * (order.PricePerUnit - arrival) * executed
+            executed_value += arrival * executed
+
+    err, balances = client.get_balances()
+    start_value = _value(initial_balances, first, base_currency)
+    end_value = _value({balance.Currency: balance.Balance for balance in balances}, last, base_currency)
+    pnl = end_value - start_value
+    return SweepResult(params=params, events=events, orders=orders, filled=filled,
+                       fill_rate=filled / orders if orders else 0.0, start_value=start_value, end_value=end_value,
+                       pnl=pnl, pnl_percent=100 * pnl / start_value if start_value else 0.0, commission=commission,
+                       slippage_bps=1e4 * slippage / executed_value if executed_value else 0.0, seconds=seconds)
+
+
+def _run(job: tuple) -> SweepResult:
+    return run_backtest(*job)
+
+
+def sweep(store_root: str, markets: List[str], tick_interval: str, strategy: StrategyFactory,
+          grid: Union[Dict[str, list], Iterable[dict]], initial_balances: Dict[str, float], spread: float = 0.0,
+          base_currency: str = 'BTC', start: Optional[float] = None, end: Optional[float] = None,
+          processes: Optional[int] = None) -> List[SweepResult]:
+    """
+    Backtest every parameter combination of a strategy in a pool of processes.
+
+    Only the store path and parameters are sent to workers; every worker memory-maps the candles itself, so the
+    market data is shared between processes and never pickled. Runs are independent, so the sweep scales with the
+    number of processes as long as there are more runs than processes.
+
+    :param store_root: root of a CandleStore holding the series
+    :param markets: list of BASE-QUOTE(BTC-USDT) to replay
+    :param tick_interval: BittrexTickIntervalTypes
+    :param strategy: picklable function of params returning the on_candle callback, e.g. a module level function
+    :param grid: dict of parameter -> values to sweep every combination of, or a list of parameter dicts
+    :param initial_balances: dict of currency -> paper balance
+    :param spread: bid-ask spread as a fraction of the close
+    :param base_currency: currency PnL is measured in
+    :param start: replay candles opened at or after this UTC epoch second, None for all
+    :param end: replay candles opened before this UTC epoch second, None for all
+    :param processes: number of worker processes, None for the number of CPUs, 1 to run in this process
+    :return: List[SweepResult] sorted by PnL, best first
+    """
+    jobs = [(store_root, markets, tick_interval, strategy, params, initial_balances, spread, base_currency, start,
+             end) for params in expand_grid(grid)]
+    if not jobs:
+        return []
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(jobs) == 1:
+        results = [_run(job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs))) as executor:
+            results = list(executor.map(_run, jobs))
+    return sorted(results, key=lambda result: result.pnl, reverse=True)
+
+
+def format_table(results: List[SweepResult]) -> str:
+    """
+    :param results: List[SweepResult]
+    :return: one line per run with its parameters, PnL, fill and slippage statistics
+    """
+    lines = [f'{"params":<40} {"pnl":>12} {"pnl %":>8} {"orders":>7} {"fill %":>7} {"commission":>11} '
+             f'{"slip bps":>9} {"seconds":>8}']
+    for result in results:
+        params = ', '.join(f'{name}={value}' for name, value in result.params.items())
+        lines.append(f'{params:<40} {result.pnl:12.8f} {result.pnl_percent:8.3f} {result.orders:7d} '
+                     f'{100 * result.fill_rate:7.2f} {result.commission:11.8f} {result.slippage_bps:9.2f} '
+                     f'{result.seconds:8.2f}')
+    return '\n'.join(lines)
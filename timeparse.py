@@ -0,0 +1,86 @@
+from array import array
+from datetime import datetime, date
+from functools import lru_cache
+from typing import Iterable, Optional
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAN = float('nan')
+
+
+def _parse(s: str) -> datetime:
+    microsecond = 0
+    if len(s) > 20 and s[19] == '.':
+        fraction = s[20:26].rstrip('Z')
+        microsecond = int(fraction.ljust(6, '0'))
+    return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:19]),
+                    microsecond)
+
+
+_parse_cached = lru_cache(maxsize=4096)(_parse)
+
+
+def parse_dt(s: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a Bittrex timestamp like 2019-06-30T12:34:56.123 to a naive UTC datetime, keeping the fraction.
+
+    Results are cached, since the same timestamps (e.g. Opened of open orders) are parsed over and over.
+
+    :param s: timestamp string
+    :return: datetime
+    """
+    if s is None:
+        return None
+    return _parse_cached(s)
+
+
+def to_epoch(s: Optional[str]) -> Optional[float]:
+    """
+    Convert a Bittrex timestamp to UTC epoch seconds
+
+    :param s: timestamp string
+    :return: float
+    """
+    if s is None:
+        return None
+    return (_parse_cached(s) - _EPOCH).total_seconds()
+
+
+def to_epoch_column(values: Iterable[Optional[str]]) -> array:
+    """
+    Convert many Bittrex timestamps to UTC epoch seconds at once. Date parts are parsed once per day, which makes
+    this much faster than parsing every value for history and candle columns. None becomes NaN.
+
+    :param values: timestamp strings
+    :return: array of float64
+    """
+    result = array('d')
+    append = result.append
+    days = {}
+    for s in values:
+        if s is None:
+            append(_NAN)
+            continue
+        day = s[:10]
+        day_seconds = days.get(day)
+        if day_seconds is None:
+            ordinal = date(int(s[0:4]), int(s[5:7]), int(s[8:10])).toordinal()
+            day_seconds = days[day] = (ordinal - _EPOCH_ORDINAL) * 86400.0
+        seconds = day_seconds + int(s[11:13]) * 3600 + int(s[14:16]) * 60 + int(s[17:19])
+        if len(s) > 20 and s[19] == '.':
+            seconds += float(s[19:].rstrip('Z'))
+        append(seconds)
+    return result
+
+
+def to_datetime64(values: Iterable[Optional[str]]):
+    """
+    Convert many Bittrex timestamps to a NumPy datetime64[ms] array, parsed by NumPy itself. None becomes NaT.
+    Requires numpy.
+
+    :param values: timestamp strings
+    :return: numpy.ndarray
+    """
+    import numpy
+
+    return numpy.array([None if s is None else s.rstrip('Z') for s in values], dtype='datetime64[ms]')
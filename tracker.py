@@ -0,0 +1,247 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prodict import Prodict
+
+
+class OrderState:
+    OPEN = 'open'
+    PARTIALLY_FILLED = 'partially_filled'
+    FILLED = 'filled'
+    CANCELED = 'canceled'
+
+
+class TrackedOrder(Prodict):
+    uuid: str
+    market: str
+    order_type: str
+    quantity: float
+    quantity_remaining: float
+    limit: float
+    price_per_unit: float
+    state: str
+
+
+class OrderEvent(Prodict):
+    state: str
+    order: TrackedOrder
+    filled: float
+
+
+class OrderTracker:
+    """
+    Tracks orders by uuid with one get_open_orders call per cycle.
+
+    Orders still open are updated from the open orders list, which also reveals partial fills. Only orders which
+    disappeared from it are looked up with get_order, to tell fills from cancels. Events go to callbacks.
+
+    The polling interval adapts to the markets of the tracked orders: it shrinks when prices move fast or an order
+    just changed, and grows back towards `max_interval` when markets are calm.
+    """
+
+    def __init__(self, client, min_interval: float = 1.0, max_interval: float = 10.0, move_percent: float = 0.1,
+                 smoothing: float = 0.3):
+        """
+        :param client: Bittrex instance
+        :param min_interval: shortest seconds between cycles
+        :param max_interval: longest seconds between cycles
+        :param move_percent: poll about every time prices are expected to move this much percent
+        :param smoothing: weight of the latest price move in the volatility average, between 0 and 1
+        """
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.move_percent = move_percent
+        self.smoothing = smoothing
+        self.interval = min_interval
+
+        self._lock = threading.Lock()
+        self._orders: Dict[str, TrackedOrder] = {}
+        self._callbacks: List[Callable[[OrderEvent], None]] = []
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._volatility: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_callback(self, callback: Callable[[OrderEvent], None]):
+        """
+        Call a function with the OrderEvent of every fill, partial fill and cancel
+
+        :param callback: function(OrderEvent)
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[OrderEvent], None]):
+        self._callbacks.remove(callback)
+
+    def track(self, uuid: str, market: Optional[str] = None):
+        """
+        Start tracking an order, e.g. the uuid returned by buy_limit or sell_limit
+
+        :param uuid: order uuid
+        :param market: BASE-QUOTE(BTC-USDT), filled in from the first poll when not given
+        """
+        with self._lock:
+            if uuid not in self._orders:
+                self._orders[uuid] = TrackedOrder(uuid=uuid, market=market, state=OrderState.OPEN)
+
+    def track_open_orders(self) -> Tuple[Any, int]:
+        """
+        Start tracking all open orders of the account
+
+        :return: error(if any), number of tracked orders
+        """
+        err, open_orders = self.client.get_open_orders()
+        if err:
+            return err, 0
+        for open_order in open_orders:
+            self.track(open_order.OrderUuid, open_order.Exchange)
+        self._update_open(open_orders)
+        return err, len(self)
+
+    def untrack(self, uuid: str):
+        with self._lock:
+            self._orders.pop(uuid, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._orders)
+
+    def orders(self) -> List[TrackedOrder]:
+        with self._lock:
+            return list(self._orders.values())
+
+    def _update_open(self, open_orders) -> List[OrderEvent]:
+        events = []
+        with self._lock:
+            for open_order in open_orders:
+                order = self._orders.get(open_order.OrderUuid)
+                if order is None:
+                    continue
+                event = self._update(order, open_order.Exchange, open_order.OrderType, open_order.Quantity,
+                                     open_order.QuantityRemaining, open_order.Limit, open_order.PricePerUnit, True)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    @staticmethod
+    def _update(order: TrackedOrder, market, order_type, quantity, remaining, limit, price_per_unit,
+                is_open: bool) -> Optional[OrderEvent]:
+        previous = order.quantity_remaining if order.quantity_remaining is not None else quantity
+        order.market = market
+        order.order_type = order_type
+        order.quantity = quantity
+        order.quantity_remaining = remaining
+        order.limit = limit
+        order.price_per_unit = price_per_unit
+
+        filled = (previous or 0) - (remaining or 0)
+        if not is_open:
+            order.state = OrderState.FILLED if not remaining else OrderState.CANCELED
+            return OrderEvent(state=order.state, order=order, filled=filled)
+        if filled > 0:
+            order.state = OrderState.PARTIALLY_FILLED
+            return OrderEvent(state=order.state, order=order, filled=filled)
+        return None
+
+    def poll(self) -> Tuple[Any, List[OrderEvent]]:
+        """
+        Run one tracking cycle and send the events to callbacks
+
+        :return: error(if any), List[OrderEvent]
+        """
+        with self._lock:
+            if not self._orders:
+                return False, []
+
+        err, open_orders = self.client.get_open_orders()
+        if err:
+            return err, []
+        events = self._update_open(open_orders)
+
+        open_uuids = {open_order.OrderUuid for open_order in open_orders}
+        with self._lock:
+            gone = [uuid for uuid in self._orders if uuid not in open_uuids]
+
+        for uuid in gone:
+            err, closed = self.client.get_order(uuid)
+            if err or closed is None:
+                continue
+            with self._lock:
+                order = self._orders.get(uuid)
+                if order is None:
+                    continue
+                event = self._update(order, closed.Exchange, closed.Type, closed.Quantity, closed.QuantityRemaining,
+                                     closed.Limit, closed.PricePerUnit, closed.IsOpen)
+                if not closed.IsOpen:
+                    del self._orders[uuid]
+            if event is not None:
+                events.append(event)
+
+        for event in events:
+            for callback in self._callbacks:
+                try:
+                    callback(event)
+                except Exception as exception1:
+                    print('Exception in order tracker callback:{}'.format(exception1))
+
+        self._adapt(bool(events))
+        return False, events
+
+    def _adapt(self, changed: bool):
+        """Set the next interval from how fast the prices of tracked markets move"""
+        if changed:
+            self.interval = self.min_interval
+            return
+
+        with self._lock:
+            markets = list({order.market for order in self._orders.values() if order.market})
+        if not markets:
+            self.interval = self.max_interval
+            return
+
+        err, tickers = self.client.get_tickers(markets)
+        if err:
+            return
+
+        now = time.monotonic()
+        fastest = 0.0
+        for market, ticker in tickers.items():
+            price = ticker.Last
+            if not price:
+                continue
+            last = self._prices.get(market)
+            self._prices[market] = (now, price)
+            if last is None or now <= last[0]:
+                continue
+            move = abs(price - last[1]) / last[1] * 100 / (now - last[0])
+            volatility = self._volatility.get(market, move)
+            volatility = self._volatility[market] = self.smoothing * move + (1 - self.smoothing) * volatility
+            fastest = max(fastest, volatility)
+
+        interval = self.move_percent / fastest if fastest > 0 else self.max_interval
+        self.interval = min(self.max_interval, max(self.min_interval, interval))
+
+    def run(self):
+        """Poll until stop is called"""
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+    def start(self) -> threading.Thread:
+        """
+        Poll in a background thread
+
+        :return: the thread
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='OrderTracker', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
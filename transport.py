@@ -0,0 +1,209 @@
+import threading
+from typing import Callable, Iterator, Union
+
+from prodict import Prodict
+
+
+class TransportStats(Prodict):
+    requests: int
+    connections_opened: int
+    connections_reused: int
+    reuse_ratio: float
+
+
+class Transport:
+    """
+    Interface for sending HTTP GET requests to Bittrex.
+
+    Implement `get` to swap the HTTP client, e.g. with a local fake in tests.
+    """
+
+    def get(self, url: str, headers: dict, timeout: float) -> bytes:
+        """
+        Send a GET request
+
+        :param url: full url
+        :param headers: request headers
+        :param timeout: seconds
+        :return: response body
+        """
+        raise NotImplementedError
+
+    def stream(self, url: str, headers: dict, timeout: float, chunk_size: int = 65536) -> Iterator[bytes]:
+        """
+        Send a GET request and read the response body in chunks. Falls back to `get` unless overridden.
+
+        :param url: full url
+        :param headers: request headers
+        :param timeout: seconds
+        :param chunk_size: bytes per chunk
+        :return: iterator of response body chunks
+        """
+        yield self.get(url, headers, timeout)
+
+    def stats(self) -> TransportStats:
+        return TransportStats(requests=0, connections_opened=0, connections_reused=0, reuse_ratio=0.0)
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _stats(requests_sent: int, connections_opened: int) -> TransportStats:
+        reused = max(requests_sent - connections_opened, 0)
+        return TransportStats(requests=requests_sent,
+                              connections_opened=connections_opened,
+                              connections_reused=reused,
+                              reuse_ratio=reused / requests_sent if requests_sent else 0.0)
+
+
+class RequestsTransport(Transport):
+    """
+    Transport on a pooled `requests.Session`. Connections are kept alive and reused by default.
+
+    requests is imported when the first instance is created, which keeps importing this module cheap.
+    """
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 10, max_retries: int = 0,
+                 backoff_factor: float = 0.1, keep_alive: bool = True):
+        """
+        :param pool_connections: number of hosts to keep pools for
+        :param pool_maxsize: connections kept per host, raise it for many concurrent threads
+        :param max_retries: retries on connection errors and 502/503/504 responses
+        :param backoff_factor: seconds to back off between retries, doubled each time
+        :param keep_alive: False closes the connection after every request
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retries = Retry(total=max_retries, backoff_factor=backoff_factor, status_forcelist=(502, 503, 504),
+                        raise_on_status=False)
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   max_retries=retries)
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+        self._count_connections()
+
+    def _count_connections(self):
+        """Make the pools count every TCP(+TLS) connect, including reconnects of closed connections"""
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+        transport = self
+
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                super().connect()
+                transport._connection_opened()
+
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                super().connect()
+                transport._connection_opened()
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = CountingHTTPConnection
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = CountingHTTPSConnection
+
+        self.adapter.poolmanager.pool_classes_by_scheme = {'http': CountingHTTPConnectionPool,
+                                                           'https': CountingHTTPSConnectionPool}
+
+    def _connection_opened(self):
+        with self._lock:
+            self._connections += 1
+
+    def get(self, url: str, headers: dict, timeout: float) -> bytes:
+        content = self.session.get(url, headers=headers, timeout=timeout).content
+        with self._lock:
+            self._requests += 1
+        return content
+
+    def stream(self, url: str, headers: dict, timeout: float, chunk_size: int = 65536) -> Iterator[bytes]:
+        with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            with self._lock:
+                self._requests += 1
+            yield from response.iter_content(chunk_size)
+
+    def stats(self) -> TransportStats:
+        with self._lock:
+            return self._stats(self._requests, self._connections)
+
+    def close(self):
+        self.session.close()
+
+
+class Http2Transport(Transport):
+    """
+    Transport on an `httpx.Client` with HTTP/2, so concurrent requests are multiplexed over one connection.
+    Requires `httpx[http2]`.
+    """
+
+    def __init__(self, max_connections: int = 10, max_keepalive_connections: int = 10):
+        import httpx
+
+        self.client = httpx.Client(http2=True,
+                                   limits=httpx.Limits(max_connections=max_connections,
+                                                       max_keepalive_connections=max_keepalive_connections))
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+
+    def _trace(self, event_name: str, info: dict):
+        if event_name == 'connection.connect_tcp.complete':
+            with self._lock:
+                self._connections += 1
+
+    def get(self, url: str, headers: dict, timeout: float) -> bytes:
+        response = self.client.get(url, headers=headers, timeout=timeout, extensions={'trace': self._trace})
+        with self._lock:
+            self._requests += 1
+        return response.content
+
+    def stream(self, url: str, headers: dict, timeout: float, chunk_size: int = 65536) -> Iterator[bytes]:
+        with self.client.stream('GET', url, headers=headers, timeout=timeout,
+                                extensions={'trace': self._trace}) as response:
+            with self._lock:
+                self._requests += 1
+            yield from response.iter_bytes(chunk_size)
+
+    def stats(self) -> TransportStats:
+        with self._lock:
+            return self._stats(self._requests, self._connections)
+
+    def close(self):
+        self.client.close()
+
+
+class CallbackTransport(Transport):
+    """
+    Transport which answers requests by calling a function instead of going to the network.
+
+    Useful as a fake in tests and for replaying recorded responses.
+    """
+
+    def __init__(self, handler: Callable[[str, dict], Union[bytes, str]]):
+        """
+        :param handler: called with url and headers, returns the response body
+        """
+        self.handler = handler
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    def get(self, url: str, headers: dict, timeout: float) -> bytes:
+        body = self.handler(url, headers)
+        with self._lock:
+            self._requests += 1
+        return body.encode() if isinstance(body, str) else body
+
+    def stats(self) -> TransportStats:
+        with self._lock:
+            return self._stats(self._requests, 0)
@@ -0,0 +1,165 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from prodict import Prodict
+
+from markets import split_market_name
+
+HUBS = ('BTC', 'ETH', 'USDT')
+
+# A conversion step is (market, invert): amount * price of market, or amount / price when invert is True
+Step = Tuple[str, bool]
+
+
+class Valuation(Prodict):
+    btc_balance: float
+    usdt_balance: float
+    estimated_total_btc: float
+    estimated_total_usdt: float
+    altcoins_total_btc_worth: float
+    altcoins_total_usdt_worth: float
+    altcoins_count: int
+    btc_worth_per_coin: float
+    btc_worth: dict
+    unpriced: list
+
+
+class ConversionGraph:
+    """
+    Conversion paths from every currency to BTC, computed once from market info.
+
+    Each currency gets its candidate paths in order of preference: a direct BTC market, then through ETH, then
+    through USDT. At valuation time the first path with prices in the summaries is used, so a coin which only trades
+    against ETH or USDT is still valued.
+    """
+
+    def __init__(self, market_info: dict, target: str = 'BTC'):
+        """
+        :param market_info: dict of MarketName -> BittrexMarket, e.g. Bittrex.market_info
+        :param target: currency to convert to
+        """
+        self.target = target
+        markets = {}
+        for market in market_info.values():
+            if market.IsActive is False:
+                continue
+            markets[(market.MarketCurrency, market.BaseCurrency)] = market.MarketName
+
+        self.paths: Dict[str, List[List[Step]]] = {}
+        currencies = {currency for pair in markets for currency in pair}
+        for currency in currencies:
+            if currency == target:
+                continue
+            paths = []
+            for hub in HUBS:
+                if hub == currency:
+                    continue
+                first = self._step(markets, currency, hub)
+                if first is None:
+                    continue
+                if hub == target:
+                    paths.append([first])
+                    continue
+                second = self._step(markets, hub, target)
+                if second is not None:
+                    paths.append([first, second])
+            if paths:
+                self.paths[currency] = paths
+
+    @classmethod
+    def from_market_names(cls, market_names: Iterable[str], target: str = 'BTC') -> 'ConversionGraph':
+        """
+        Conversion paths from market names alone, e.g. the summaries when market info could not be loaded
+
+        :param market_names: BASE-QUOTE(BTC-USDT) names of active markets
+        :param target: currency to convert to
+        :return: ConversionGraph
+        """
+        market_info = {}
+        for name in market_names:
+            base_currency, currency = split_market_name(name)
+            market_info[name] = Prodict(MarketName=name, BaseCurrency=base_currency, MarketCurrency=currency,
+                                        IsActive=True)
+        return cls(market_info, target)
+
+    @staticmethod
+    def _step(markets: dict, currency: str, to: str) -> Optional[Step]:
+        if (currency, to) in markets:
+            return markets[(currency, to)], False
+        if (to, currency) in markets:
+            return markets[(to, currency)], True
+        return None
+
+    def rate(self, currency: str, summaries: dict, price: str = 'Ask') -> Optional[float]:
+        """
+        Price of one unit of currency in the target currency
+
+        :param currency: e.g. LTC
+        :param summaries: dict of MarketName -> BittrexMarketSummary
+        :param price: summary field to price with, 'Ask', 'Bid' or 'Last'
+        :return: float, None if no path has prices
+        """
+        if currency == self.target:
+            return 1.0
+
+        for path in self.paths.get(currency, ()):
+            rate = 1.0
+            for market, invert in path:
+                summary = summaries.get(market)
+                market_price = summary[price] if summary is not None else None
+                if not market_price:
+                    break
+                rate = rate / market_price if invert else rate * market_price
+            else:
+                return rate
+        return None
+
+    def value(self, balances: dict, summaries: dict, price: str = 'Ask') -> Valuation:
+        """
+        Value balances in BTC and USDT.
+
+        Like before, the USDT balance is reported on its own and is not part of the estimated totals.
+
+        :param balances: dict of Currency -> BittrexBalance, e.g. from Bittrex.get_balances_dict
+        :param summaries: dict of MarketName -> BittrexMarketSummary
+        :param price: summary field to price with, 'Ask', 'Bid' or 'Last'
+        :return: Valuation
+        """
+        btc_balance = 0
+        usdt_balance = 0
+        altcoins_total_btc_worth = 0
+        btc_worth = {}
+        unpriced = []
+
+        for currency, balance_info in balances.items():
+            currency_balance = balance_info['Balance']
+            if not currency_balance:
+                continue
+            if currency == 'BTC':
+                btc_balance = currency_balance
+                continue
+            if currency == 'USDT':
+                usdt_balance = currency_balance
+                continue
+
+            rate = self.rate(currency, summaries, price)
+            if rate is None:
+                unpriced.append(currency)
+                continue
+            btc_worth[currency] = currency_balance * rate
+            altcoins_total_btc_worth += btc_worth[currency]
+
+        btc_summary = summaries.get('USDT-BTC')
+        btc_price_in_usdt = btc_summary[price] if btc_summary is not None else 0
+        estimated_total_btc = altcoins_total_btc_worth + btc_balance
+        altcoins_count = len(balances)
+
+        return Valuation(btc_balance=btc_balance,
+                         usdt_balance=usdt_balance,
+                         estimated_total_btc=estimated_total_btc,
+                         estimated_total_usdt=estimated_total_btc * btc_price_in_usdt,
+                         altcoins_total_btc_worth=altcoins_total_btc_worth,
+                         altcoins_total_usdt_worth=altcoins_total_btc_worth * btc_price_in_usdt,
+                         altcoins_count=altcoins_count,
+                         btc_worth_per_coin=altcoins_total_btc_worth / altcoins_count if altcoins_count > 0 else 0,
+                         btc_worth=btc_worth,
+                         unpriced=unpriced)